@@ -0,0 +1,95 @@
+# orchestrator.py
+"""
+Deadline-budgeted stage runner for /triage.
+
+Every request gets an end-to-end budget. Required stages (the rules) always run,
+in order. Optional stages (LLM reason, ...) then run concurrently with whatever
+budget is left: a stage is skipped if the remainder is below its `min_ms`, and
+abandoned (status "timeout") if it has not finished by the deadline. The result
+records what happened to each stage, so tail latency is set by the budget and
+not by the slowest backend.
+"""
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, Any, List, Optional
+import time, logging
+
+logger = logging.getLogger(__name__)
+
+# stage statuses
+OK, SKIPPED, TIMEOUT, ERROR, EMPTY = "ok", "skipped", "timeout", "error", "empty"
+
+
+class Budget:
+    def __init__(self, ms: float):
+        self.ms = ms
+        self.start = time.monotonic()
+        self.deadline = self.start + ms / 1000.0
+
+    def remaining_ms(self) -> float:
+        return max(0.0, (self.deadline - time.monotonic()) * 1000.0)
+
+    def elapsed_ms(self) -> float:
+        return (time.monotonic() - self.start) * 1000.0
+
+
+class Stage:
+    """
+    fn(ctx, remaining_s) -> value stored in ctx[name]. A None value from an
+    optional stage is recorded as "empty" (e.g. the LLM backend is down).
+    """
+    def __init__(self, name: str, fn: Callable[[Dict[str, Any], float], Any], min_ms: float = 0.0):
+        self.name = name
+        self.fn = fn
+        self.min_ms = min_ms
+
+
+class Orchestrator:
+    def __init__(self, max_workers: int = 16, reserve_ms: float = 5.0):
+        # reserve_ms is kept back from optional stages for assembling the response
+        self.reserve_ms = reserve_ms
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="triage-stage")
+
+    def run(self, budget_ms: float, required: List[Stage], optional: List[Stage],
+            ctx: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Run the stages and return ctx, with ctx["stages"] = {name: status} and
+        ctx["elapsed_ms"]. Errors in required stages propagate.
+        """
+        budget = Budget(budget_ms)
+        ctx = {} if ctx is None else ctx
+        status: Dict[str, str] = {}
+        ctx["stages"] = status
+
+        for st in required:
+            ctx[st.name] = st.fn(ctx, budget.remaining_ms() / 1000.0)
+            status[st.name] = OK
+
+        avail = budget.remaining_ms() - self.reserve_ms
+        futures = {}
+        for st in optional:
+            if avail < st.min_ms:
+                status[st.name] = SKIPPED
+                ctx[st.name] = None
+                continue
+            futures[self._pool.submit(st.fn, ctx, avail / 1000.0)] = st
+
+        if futures:
+            done, pending = wait(futures, timeout=max(0.0, budget.remaining_ms() - self.reserve_ms) / 1000.0)
+            for fut, st in futures.items():
+                ctx[st.name] = None
+                if fut in pending:
+                    fut.cancel()  # best effort; a running call is simply abandoned
+                    status[st.name] = TIMEOUT
+                    continue
+                try:
+                    value = fut.result()
+                except Exception as e:
+                    logger.warning("stage %s failed: %s", st.name, e)
+                    status[st.name] = ERROR
+                    continue
+                ctx[st.name] = value
+                status[st.name] = OK if value is not None else EMPTY
+
+        ctx["elapsed_ms"] = round(budget.elapsed_ms(), 1)
+        return ctx
@@ -0,0 +1,311 @@
+# rule_engine.py
+"""
+Declarative START rules (model/rules/start_rules.json) compiled to one function.
+
+The table holds keyword groups, pulse value sets, thresholds and an ordered
+rule list (first match wins). At load time it is compiled into:
+  - one regex that finds every keyword group present in a description in a
+    single pass, and
+  - one generated Python function with the rule conditions inlined,
+and the result is checked against the golden case files named in the table.
+RuleEngine swaps in a new table when the file changes, without a restart; a
+table that fails to compile or to match the golden set is rejected and the
+previous version keeps serving.
+"""
+from __future__ import annotations
+from typing import Optional, Union, Dict, Any, List, Tuple, Callable, FrozenSet
+import hashlib, json, os, pathlib, re, threading, time, logging
+
+logger = logging.getLogger(__name__)
+
+ROOT = pathlib.Path(__file__).resolve().parent
+RULES_PATH = ROOT / "model" / "rules" / "start_rules.json"
+LABELS = ("Expectant", "Immediate", "Delayed", "Minor")
+
+Decision = Tuple[str, str]  # (label, reason)
+
+
+class RuleTableError(ValueError):
+    pass
+
+
+def parse_cap_refill(x) -> Optional[float]:
+    """'>2' -> 2.01, '<2' -> 1.99, '3' / 3.0 -> 3.0, anything else -> None."""
+    if x is None:
+        return None
+    s = str(x).strip().lower()
+    try:
+        return float(s)
+    except ValueError:
+        pass
+    try:
+        if s.startswith(">"):
+            return float(s[1:]) + 0.01  # treat >2 as just over 2
+        if s.startswith("<"):
+            return float(s[1:]) - 0.01  # treat <2 as just under 2
+    except ValueError:
+        return None
+    return None
+
+
+# ------------------ compilation ------------------
+def _keyword_matcher(groups: Dict[str, List[str]]) -> Callable[[str], FrozenSet[str]]:
+    owner: Dict[str, str] = {}
+    for group, words in groups.items():
+        for w in words:
+            w = w.lower()
+            if owner.get(w, group) != group:
+                raise RuleTableError(f"keyword {w!r} is in both {owner[w]!r} and {group!r}")
+            owner[w] = group
+    # The lookahead lets matches overlap, but at each position only the longest
+    # alternative is reported, so a keyword that is a prefix of another group's
+    # keyword would be hidden. Reject that instead of silently missing it.
+    for a in owner:
+        for b in owner:
+            if a != b and b.startswith(a) and owner[a] != owner[b]:
+                raise RuleTableError(f"keyword {a!r} ({owner[a]}) is a prefix of {b!r} ({owner[b]})")
+
+    if not owner:
+        return lambda text: frozenset()
+    alt = "|".join(re.escape(w) for w in sorted(owner, key=len, reverse=True))
+    finditer = re.compile(f"(?=({alt}))").finditer
+    get = owner.__getitem__
+
+    def match(text: str) -> FrozenSet[str]:
+        return frozenset(get(m.group(1)) for m in finditer(text))
+
+    return match
+
+
+def _threshold(table: Dict[str, Any], key: str) -> float:
+    try:
+        return float(table["thresholds"][key])
+    except KeyError:
+        raise RuleTableError(f"missing threshold {key!r}") from None
+    except (TypeError, ValueError):
+        raise RuleTableError(f"threshold {key!r} is not a number: {table['thresholds'][key]!r}") from None
+
+
+def _condition(term: str, table: Dict[str, Any], pulse_vars: Dict[str, str]) -> str:
+    kind, _, arg = term.partition(":")
+    if kind == "kw":
+        if arg not in table["keywords"]:
+            raise RuleTableError(f"unknown keyword group {arg!r}")
+        return f"{arg!r} in s"
+    if kind == "pulse":
+        if arg not in pulse_vars:
+            raise RuleTableError(f"unknown pulse set {arg!r}")
+        return f"pulse in {pulse_vars[arg]}"
+    if term == "rr:zero":
+        return "rr == 0"
+    if term == "rr:over":
+        return f"(rr is not None and rr > {_threshold(table, 'resp_rate_max')!r})"
+    if term == "cr:over":
+        return f"(cr is not None and cr > {_threshold(table, 'cap_refill_max')!r})"
+    raise RuleTableError(f"unknown condition {term!r}")
+
+
+def _clause(clause: Union[str, List[str]], table: Dict[str, Any], pulse_vars: Dict[str, str]) -> str:
+    # a clause is one term, or a list of terms any of which may hold
+    if isinstance(clause, str):
+        return _condition(clause, table, pulse_vars)
+    if not clause:
+        raise RuleTableError("empty OR-clause")
+    return "(" + " or ".join(_condition(t, table, pulse_vars) for t in clause) + ")"
+
+
+def _outcome(rule: Any, where: str) -> Decision:
+    if not isinstance(rule, dict):
+        raise RuleTableError(f"{where}: expected an object, got {rule!r}")
+    if rule.get("label") not in LABELS:
+        raise RuleTableError(f"{where}: invalid label {rule.get('label')!r}")
+    if not isinstance(rule.get("reason"), str):
+        raise RuleTableError(f"{where}: missing 'reason'")
+    return rule["label"], rule["reason"]
+
+
+# learned signals may only move a patient towards more urgent care
+_URGENCY = {"Immediate": 0, "Delayed": 1, "Minor": 2}
+
+
+def compile_table(table: Dict[str, Any]) -> Callable[..., Decision]:
+    """
+    Build decide(description, resp_rate, pulse, cap_refill, extra) -> (label, reason).
+    `extra` is a set of keyword-group names to treat as present (learned signals).
+    Only groups listed in the table's "learned_signals" are honoured, and only
+    when they raise the decision (Minor/Delayed -> Immediate); they never
+    change an Expectant call or produce one.
+    Any problem with the table raises RuleTableError.
+    """
+    try:
+        return _compile_table(table)
+    except RuleTableError:
+        raise
+    except Exception as e:  # malformed structure (wrong types, bad regex, ...)
+        raise RuleTableError(f"cannot compile rule table: {type(e).__name__}: {e}") from e
+
+
+def _compile_table(table: Dict[str, Any]) -> Callable[..., Decision]:
+    if not isinstance(table, dict):
+        raise RuleTableError("rule table must be a JSON object")
+    for key in ("keywords", "thresholds", "rules", "default"):
+        if key not in table:
+            raise RuleTableError(f"rule table missing {key!r}")
+
+    env: Dict[str, Any] = {
+        "_match": _keyword_matcher(table["keywords"]),
+        "_cap": parse_cap_refill,
+    }
+    # pulse sets are bound to generated names, so any set name in the JSON is
+    # safe (it never becomes an identifier in the source)
+    pulse_vars: Dict[str, str] = {}
+    for i, (name, values) in enumerate(table.get("pulse", {}).items()):
+        pulse_vars[name] = f"_p{i}"
+        env[f"_p{i}"] = frozenset(v.lower() for v in values)
+
+    lines = [
+        "def decide(description, resp_rate=None, pulse=None, cap_refill=None, extra=None):",
+        "    s = _match((description or '').lower())",
+        "    if extra: s = s | extra",
+        "    rr = resp_rate",
+        "    pulse = (pulse or '').lower().strip()",
+        "    cr = _cap(cap_refill)",
+    ]
+    for i, rule in enumerate(table["rules"]):
+        env[f"_r{i}"] = _outcome(rule, f"rule {i}")
+        when = rule.get("when")
+        if not when:
+            raise RuleTableError(f"rule {i}: empty 'when'")
+        cond = " and ".join(_clause(c, table, pulse_vars) for c in when)
+        lines.append(f"    if {cond}: return _r{i}")
+    env["_default"] = _outcome(table["default"], "default")
+    lines.append("    return _default")
+
+    learned = frozenset(table.get("learned_signals", []))
+    unknown = learned - set(table["keywords"])
+    if unknown:
+        raise RuleTableError(f"learned_signals {sorted(unknown)} are not keyword groups")
+
+    src = "\n".join(lines)
+    exec(compile(src, f"<rules {table.get('version', '?')}>", "exec"), env)
+    rules_only = env["decide"]
+
+    def decide(description, resp_rate=None, pulse=None, cap_refill=None, extra=None):
+        base = rules_only(description, resp_rate, pulse, cap_refill)
+        up = extra & learned if extra else None
+        if not up or base[0] not in _URGENCY:
+            return base
+        alt = rules_only(description, resp_rate, pulse, cap_refill, up)
+        return alt if _URGENCY.get(alt[0], 99) < _URGENCY[base[0]] else base
+
+    decide.source = src  # kept for debugging / GET /rules
+    decide.learned_signals = learned
+    return decide
+
+
+SignalFn = Callable[[str], FrozenSet[str]]  # description -> learned signals
+
+
+def check_golden(decide: Callable[..., Decision], cases: List[Dict[str, Any]],
+                 signals: Optional[SignalFn] = None) -> List[str]:
+    """
+    Return one line per golden case the compiled function gets wrong, with the
+    learned signals from `signals` applied if given.
+    """
+    errors = []
+    for c in cases:
+        v = c.get("vitals") or {}
+        desc = c.get("description", "")
+        extra = signals(desc) if signals is not None else None
+        label, reason = decide(desc, v.get("resp_rate"), v.get("pulse"), v.get("cap_refill"), extra)
+        if label != c.get("expected_triage"):
+            errors.append(f"{desc!r}: got {label} ({reason}), expected {c.get('expected_triage')}"
+                          + (f" with signals {sorted(extra)}" if extra else ""))
+    return errors
+
+
+# ------------------ hot-reloadable engine ------------------
+class RuleEngine:
+    def __init__(self, path: Union[str, pathlib.Path] = RULES_PATH, check_interval_s: float = 1.0):
+        self.path = pathlib.Path(path)
+        self.check_interval_s = check_interval_s
+        self.history: List[Dict[str, Any]] = []  # one entry per loaded version
+        self._lock = threading.Lock()
+        self._next_check = 0.0
+        self._mtime = None
+        self._decide: Optional[Callable[..., Decision]] = None
+        self._golden: List[Dict[str, Any]] = []
+        self.signals: Optional[SignalFn] = None  # set by use_signals() once verified
+        self.version: Optional[str] = None
+        self.reload()  # a bad table at startup is fatal
+
+    def reload(self) -> str:
+        """
+        Load, compile and verify the table; swap it in only if all checks pass.
+        Raises RuleTableError (previous version stays active) otherwise.
+        """
+        with self._lock:
+            try:
+                mtime = os.stat(self.path).st_mtime
+                raw = self.path.read_bytes()
+                table = json.loads(raw)
+            except (OSError, ValueError) as e:
+                raise RuleTableError(f"{self.path}: {e}") from e
+            decide = compile_table(table)
+
+            cases: List[Dict[str, Any]] = []
+            try:
+                for rel in table.get("golden", []):
+                    cases += json.loads((ROOT / rel).read_text(encoding="utf-8"))
+                errors = check_golden(decide, cases)
+                if not errors and self.signals is not None:
+                    errors = check_golden(decide, cases, self.signals)
+            except (OSError, ValueError, TypeError, AttributeError) as e:
+                raise RuleTableError(f"golden cases: {type(e).__name__}: {e}") from e
+            if errors:
+                raise RuleTableError(f"{len(errors)} golden case(s) failed, first: {errors[0]}")
+
+            version = f"{table.get('version', 'unversioned')}+{hashlib.sha1(raw).hexdigest()[:8]}"
+            self._decide = decide  # single reference swap; readers never see a half-built table
+            self._golden = cases
+            self._mtime = mtime
+            self.version = version
+            self.history.append({"version": version, "loaded_at": time.time(), "golden_cases": len(cases)})
+            logger.info("rules %s loaded (%d rules, %d golden cases ok)", version, len(table["rules"]), len(cases))
+            return version
+
+    def use_signals(self, signals: SignalFn):
+        """
+        Enable a learned signal source after checking that the current table
+        still passes every golden case with its signals applied. Raises
+        RuleTableError (and leaves signals off) otherwise. Later reloads are
+        checked both with and without the signals.
+        """
+        with self._lock:
+            errors = check_golden(self._decide, self._golden, signals)
+            if errors:
+                raise RuleTableError(f"{len(errors)} golden case(s) fail with learned signals, first: {errors[0]}")
+            self.signals = signals
+
+    def maybe_reload(self):
+        # at most one stat() per check_interval_s on the request path
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.check_interval_s
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            self.reload()
+        except Exception as e:
+            self._mtime = mtime  # don't retry the same bad file on every check
+            logger.warning("rule reload rejected, keeping %s: %s", self.version, e)
+
+    def decide(self, description: str, resp_rate: Optional[float] = None, pulse: Optional[str] = None,
+               cap_refill: Optional[Union[str, float]] = None, extra: Optional[FrozenSet[str]] = None) -> Decision:
+        self.maybe_reload()
+        return self._decide(description, resp_rate, pulse, cap_refill, extra)
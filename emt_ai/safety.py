@@ -0,0 +1,127 @@
+# safety.py
+"""
+Output safety filter: no medications, no dosages, no invasive procedures.
+
+All term patterns are compiled into one case-insensitive regex (one named group per
+category), so a check is a single scan. StreamScanner applies it to streamed
+tokens: each feed() only rescans the new text plus a short overlap, so the
+per-token cost stays constant no matter how long the output gets.
+"""
+from __future__ import annotations
+from typing import Optional, List, NamedTuple
+import re
+
+# Terms are regex fragments matched case-insensitively between word
+# boundaries; stems (\w*) and optional plurals (s?) cover inflected forms.
+# Generic class words are allowed after "no" / "without" ("No medications
+# needed" is exactly what the prompt asks for).
+_NOT_NEGATED = r"(?<!\bno )(?<!\bwithout )"
+
+DRUGS = [
+    "aspirin", "ibuprofen", "paracetamol", "acetaminophen", "naproxen", "diclofenac", "ketorolac",
+    "morphine", "fentanyl", "ketamine", "tramadol", "codeine", "oxycodone", "hydromorphone",
+    "opioids?", "opiates?",
+    "epinephrine", "adrenaline", "epipen", "naloxone", "narcan", "atropine", "amiodarone",
+    "diazepam", "midazolam", "lorazepam", "benzodiazepines?", "ondansetron",
+    "salbutamol", "albuterol", "nitroglycerin", "insulin", "lidocaine", "heparin",
+    "tranexamic acid", "txa", "penicillin", "amoxicillin",
+    "prednisone", "dexamethasone",
+    # brand names
+    "tylenol", "panadol", "advil", "motrin", "nurofen", "aleve", "voltaren", "toradol",
+    "percocet", "vicodin", "dilaudid", "valium", "ativan", "versed", "xanax",
+    "benadryl", "zofran", "ventolin",
+    # generic classes
+    _NOT_NEGATED + "antibiotics?", _NOT_NEGATED + "steroids?", _NOT_NEGATED + "antihistamines?",
+    _NOT_NEGATED + "sedatives?", _NOT_NEGATED + "painkillers?", _NOT_NEGATED + "analgesics?",
+    _NOT_NEGATED + "medications?", _NOT_NEGATED + "medicines?", _NOT_NEGATED + "meds",
+]
+
+INVASIVE = [
+    r"intubat\w*", "endotracheal", r"cricothyr\w*", r"trache(?:ostom|otom)\w*",
+    "needle decompression", "chest tubes?", r"thoracostom\w*", r"thoracotom\w*",
+    "iv", "ivs", "iv lines?", "iv access", "iv fluids", r"intravenous\w*", r"intraosseous\w*",
+    r"cannul\w*", r"catheter\w*", r"inject\w*", r"incision\w*", r"sutur\w*",
+    r"stitch\w*", r"surger\w*", r"surgical\w*", r"amputat\w*",
+]
+
+# numbers with a dosing unit: "5 mg", "0.3mg", "500 ml", "10 units",
+# or a counted dose form: "2 tablets", "two pills", "1 puff"
+_COUNT = r"(?:\d{1,3}|one|two|three|four|five|six|half|a|an)"
+DOSE = (r"\d{1,5}(?:\.\d{1,3})?\s?(?:mg|mcg|µg|ug|g|ml|cc|units?|iu|mg/kg)"
+        rf"|{_COUNT}\s(?:tablets?|tabs?|pills?|capsules?|caps|puffs?|sprays?|drops?)")
+
+
+class Hit(NamedTuple):
+    category: str  # "drug" | "dose" | "invasive"
+    term: str
+
+
+def _alt(patterns: List[str]) -> str:
+    # longest first, so "chest tubes?" wins over a shorter overlapping term
+    return "|".join(sorted(set(patterns), key=len, reverse=True))
+
+
+class SafetyFilter:
+    def __init__(self, drugs: List[str] = DRUGS, invasive: List[str] = INVASIVE, dose: str = DOSE):
+        self._re = re.compile(
+            rf"\b(?:(?P<drug>{_alt(drugs)})|(?P<invasive>{_alt(invasive)})|(?P<dose>{dose}))\b",
+            re.IGNORECASE,
+        )
+        # a stream keeps this much of the previous text: enough for the
+        # longest term pattern plus an inflected ending
+        self.overlap = max(len(w) for w in drugs + invasive) + 32
+
+    def scan(self, text: str) -> Optional[Hit]:
+        m = self._re.search(text or "")
+        return Hit(m.lastgroup, m.group(0)) if m else None
+
+    def check_batch(self, texts: List[str]) -> List[Optional[Hit]]:
+        search = self._re.search
+        out: List[Optional[Hit]] = []
+        for t in texts:
+            m = search(t or "")
+            out.append(Hit(m.lastgroup, m.group(0)) if m else None)
+        return out
+
+    def scanner(self) -> "StreamScanner":
+        return StreamScanner(self)
+
+
+class StreamScanner:
+    """
+    Incremental scan over streamed chunks. feed() returns the first Hit as soon
+    as it is certain; close() flushes the end of the stream.
+    """
+    __slots__ = ("_re", "_overlap", "_buf", "hit")
+
+    def __init__(self, f: SafetyFilter):
+        self._re = f._re
+        self._overlap = f.overlap
+        self._buf = ""
+        self.hit: Optional[Hit] = None
+
+    def feed(self, chunk: str) -> Optional[Hit]:
+        if self.hit is not None:
+            return self.hit
+        buf = self._buf + chunk
+        end = len(buf)
+        for m in self._re.finditer(buf):
+            # a match touching the end of the buffer may still grow or lose its
+            # word boundary ("iv" + "ory"), so it only counts once more text arrives
+            if m.end() < end:
+                self.hit = Hit(m.lastgroup, m.group(0))
+                return self.hit
+        self._buf = buf[-self._overlap:]
+        return None
+
+    def close(self) -> Optional[Hit]:
+        if self.hit is None:
+            m = self._re.search(self._buf)
+            if m:
+                self.hit = Hit(m.lastgroup, m.group(0))
+        return self.hit
+
+
+DEFAULT_FILTER = SafetyFilter()
+scan = DEFAULT_FILTER.scan
+check_batch = DEFAULT_FILTER.check_batch
@@ -0,0 +1,89 @@
+# scripts/bench_local_llm.py
+"""
+Throughput of the in-process backend: micro-batched vs one request at a time.
+
+  python scripts/bench_local_llm.py --model TinyLlama/TinyLlama-1.1B-Chat-v1.0
+  python scripts/bench_local_llm.py --random-tiny /tmp/tiny-llama   # no download needed
+
+--random-tiny builds a small randomly initialised Llama plus a tokenizer
+trained on the prompt text, so the batching / prefix-cache mechanics can be
+measured on a box with no model files. Its output text is meaningless.
+"""
+import argparse, json, pathlib, sys, threading, time
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from server.local_llm import LocalLLMClient, DEFAULT_LOCAL_MODEL  # noqa: E402
+from server.prompts import load_template  # noqa: E402
+
+
+def build_random_tiny(path: pathlib.Path):
+    from tokenizers import Tokenizer, models, pre_tokenizers, trainers, decoders
+    from transformers import LlamaConfig, LlamaForCausalLM, PreTrainedTokenizerFast
+
+    cases = json.loads((ROOT / "scripts" / "datasets" / "cases_expanded.json").read_text(encoding="utf-8"))
+    corpus = [load_template("v1").prefix] + [c["description"] for c in cases]
+    tok = Tokenizer(models.BPE(unk_token="<unk>"))
+    tok.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+    tok.decoder = decoders.ByteLevel()
+    tok.train_from_iterator(corpus, trainers.BpeTrainer(
+        vocab_size=2000, special_tokens=["<unk>", "<s>", "</s>"],
+        initial_alphabet=pre_tokenizers.ByteLevel.alphabet()))
+    fast = PreTrainedTokenizerFast(tokenizer_object=tok, unk_token="<unk>", bos_token="<s>", eos_token="</s>")
+    cfg = LlamaConfig(vocab_size=fast.vocab_size, hidden_size=256, intermediate_size=688,
+                      num_hidden_layers=4, num_attention_heads=8, num_key_value_heads=4,
+                      bos_token_id=fast.bos_token_id, eos_token_id=fast.eos_token_id)
+    LlamaForCausalLM(cfg).save_pretrained(path)
+    fast.save_pretrained(path)
+
+
+def run(client, n, concurrency):
+    cases = json.loads((ROOT / "scripts" / "datasets" / "cases_expanded.json").read_text(encoding="utf-8"))
+    work = [cases[i % len(cases)] for i in range(n)]
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                if not work:
+                    return
+                c = work.pop()
+            client.safe_reason(c["expected_triage"], c["description"], c["vitals"])
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return n / (time.perf_counter() - t0)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--model", default=DEFAULT_LOCAL_MODEL)
+    ap.add_argument("--random-tiny", metavar="DIR", help="build and use a random tiny Llama in DIR")
+    ap.add_argument("-n", type=int, default=64, help="requests per run")
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--max-new-tokens", type=int, default=32)
+    args = ap.parse_args()
+
+    model = args.model
+    if args.random_tiny:
+        path = pathlib.Path(args.random_tiny)
+        if not (path / "config.json").exists():
+            build_random_tiny(path)
+        model = str(path)
+
+    results = {}
+    for label, max_batch in (("one-at-a-time", 1), (f"batched (max_batch={args.concurrency})", args.concurrency)):
+        client = LocalLLMClient(model=model, max_batch=max_batch, max_new_tokens=args.max_new_tokens, timeout=600)
+        client.warm_up()
+        results[label] = run(client, args.n, args.concurrency)
+        print(f"{label:28s} {results[label]:7.2f} req/s")
+    base, batched = results.values()
+    print(f"speed-up: {batched / base:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
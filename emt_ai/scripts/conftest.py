@@ -0,0 +1,5 @@
+# scripts/conftest.py
+# Tests here import both sibling scripts and the emt_ai packages (server/, rule_engine, ...).
+import sys, pathlib
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
@@ -0,0 +1,119 @@
+# scripts/replay_cases.py
+"""
+Replay an exported case log (GET /cases/export) through the triage logic.
+
+  python scripts/replay_cases.py cases.jsonl.gz --target rules
+  python scripts/replay_cases.py cases.parquet --target app --url http://127.0.0.1:8000 --speed 10
+
+--target start  scripts/start_engine.start_triage (same rule table, label only)
+--target rules  the rule table the server uses (rule_engine.RuleEngine)
+--target app    POST /triage on a running server (sent with X-Triage-Replay: 1, so
+                the server does not add the replayed cases to its own log)
+--speed 0 replays as fast as possible; 1 keeps the recorded spacing; 10 is 10x.
+
+The log is streamed row by row and only counters are kept, so a 1M-case
+incident replays in constant memory.
+"""
+import argparse, gzip, json, pathlib, sys, time
+from collections import Counter
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+
+def iter_export(path, batch=10_000):
+    path = pathlib.Path(path)
+    if path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        for b in pq.ParquetFile(path).iter_batches(batch_size=batch):
+            yield from b.to_pylist()
+        return
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def make_target(name, url):
+    if name == "start":
+        from start_engine import start_triage
+
+        return lambda c: start_triage(c["description"], c["resp_rate"], c["pulse"], c["cap_refill"])
+    if name == "rules":
+        from rule_engine import RuleEngine
+
+        engine = RuleEngine()
+        return lambda c: engine.decide(c["description"], c["resp_rate"], c["pulse"], c["cap_refill"])[0]
+    if name == "app":
+        import requests
+
+        session = requests.Session()
+        session.headers["X-Triage-Replay"] = "1"
+
+        def post(c):
+            body = {"description": c["description"],
+                    "vitals": {"resp_rate": c["resp_rate"], "pulse": c["pulse"], "cap_refill": c["cap_refill"]}}
+            r = session.post(f"{url.rstrip('/')}/triage", json=body, timeout=30)
+            r.raise_for_status()
+            return r.json()["triage_level"]
+
+        return post
+    raise SystemExit(f"unknown target {name!r}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("log")
+    ap.add_argument("--target", choices=["start", "rules", "app"], default="rules")
+    ap.add_argument("--url", default="http://127.0.0.1:8000")
+    ap.add_argument("--speed", type=float, default=0.0)
+    ap.add_argument("--diffs", help="write disagreeing cases to this JSONL file")
+    args = ap.parse_args()
+
+    run = make_target(args.target, args.url)
+    diffs = open(args.diffs, "w", encoding="utf-8") if args.diffs else None
+    n = agree = errors = 0
+    changes = Counter()
+    lat_total = lat_max = 0.0
+    t_start = time.monotonic()
+    ts0 = None
+
+    for c in iter_export(args.log):
+        if args.speed > 0 and c.get("ts") is not None:
+            ts0 = c["ts"] if ts0 is None else ts0
+            wait = (c["ts"] - ts0) / args.speed - (time.monotonic() - t_start)
+            if wait > 0:
+                time.sleep(wait)
+        t0 = time.perf_counter()
+        try:
+            got = run(c)
+        except Exception as e:
+            errors += 1
+            print(f"case {c.get('id')}: {e}", file=sys.stderr)
+            continue
+        dt = time.perf_counter() - t0
+        lat_total += dt
+        lat_max = max(lat_max, dt)
+        n += 1
+        if got == c.get("triage_level"):
+            agree += 1
+        else:
+            changes[(c.get("triage_level"), got)] += 1
+            if diffs:
+                diffs.write(json.dumps({**c, "replayed_level": got}, ensure_ascii=False) + "\n")
+
+    if diffs:
+        diffs.close()
+    print(f"replayed {n} cases via {args.target} in {time.monotonic() - t_start:.1f}s "
+          f"({errors} errors)")
+    if n:
+        print(f"agreement: {agree}/{n} = {agree / n * 100:.2f}%")
+        print(f"latency: mean {lat_total / n * 1e3:.2f} ms, max {lat_max * 1e3:.2f} ms")
+    for (was, now), k in changes.most_common():
+        print(f"  {was} -> {now}: {k}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import time
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+
+@pytest.fixture
+def app_module(tmp_path, monkeypatch):
+    monkeypatch.setenv("TRIAGE_DB_PATH", str(tmp_path / "triage.db"))
+    import server.app as app_module
+    from server import db
+
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "triage.db")
+    monkeypatch.setitem(app_module.STARTUP, "ready", False)
+    monkeypatch.setitem(app_module.STARTUP, "llm_warm", False)
+    monkeypatch.setitem(app_module.STARTUP, "warmup_attempts", 0)
+    return app_module
+
+
+class WarmLLM:
+    def __init__(self):
+        self.warm_ups = 0
+
+    def is_alive(self):
+        return True
+
+    def warm_up(self):
+        self.warm_ups += 1
+        return True
+
+    def safe_reason(self, label, description, vitals, timeout=None):
+        return "Stable vitals suggest a lower priority."
+
+
+def test_lifespan_warms_up_and_starts_timers(app_module, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    stub = WarmLLM()
+    monkeypatch.setattr(app_module, "llm", stub)
+    with TestClient(app_module.app) as client:   # runs the lifespan handler
+        deadline = time.monotonic() + 5
+        while client.get("/ready").status_code != 200 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        r = client.get("/ready")
+        assert not app_module._timer_task.done()   # reassessment loop started by lifespan
+    assert r.status_code == 200
+    assert r.json()["llm_warm"] is True and r.json()["warmup_attempts"] == 1
+    assert stub.warm_ups == 1
+
+
+def test_cached_retriage_keeps_learned_signals(app_module, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    pytest.importorskip("numpy")
+    if app_module.rules.signals is None:
+        pytest.skip("learned tier not enabled")
+    monkeypatch.setattr(app_module, "llm", WarmLLM())
+    body = {"description": "35M, unconcious, RR 20", "patient_id": "T-signals",
+            "vitals": {"resp_rate": 20, "pulse": "strong", "cap_refill": "<2"}}
+    client = TestClient(app_module.app)
+    first = client.post("/triage", json=body).json()
+    again = client.post("/triage", json=body).json()
+    assert first["learned_signals"] == ["mental"] and first["triage_level"] == "Immediate"
+    assert again["stages"] == {"cached": "ok"}
+    assert again["learned_signals"] == first["learned_signals"]
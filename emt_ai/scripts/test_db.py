@@ -0,0 +1,22 @@
+import sqlite3, time
+from server import db
+
+
+def test_log_case_does_not_wait_for_a_locked_database(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "triage.db")
+    list(db.iter_cases())                                  # creates the table
+
+    blocker = sqlite3.connect(db.DB_PATH)
+    blocker.execute("BEGIN IMMEDIATE")                     # hold the write lock
+    t0 = time.perf_counter()
+    for i in range(50):
+        db.log_case(f"case {i}", 18, "strong", None, "Minor", "Walking.")
+    assert time.perf_counter() - t0 < 0.1
+    assert not db.flush(0.2)                               # writer is still waiting on the lock
+    blocker.rollback()
+    blocker.close()
+
+    assert db.flush(5.0)
+    rows = list(db.iter_cases())
+    assert [r["description"] for r in rows] == [f"case {i}" for i in range(50)]
+    assert rows[0]["cap_refill"] is None
@@ -0,0 +1,44 @@
+import time
+from server.llm_pool import LLMPool
+
+
+class FakeClient:
+    def __init__(self, name, fail=False, alive=True):
+        self.base_url = name
+        self.fail = fail
+        self.alive = alive
+        self.calls = 0
+
+    def is_alive(self):
+        return self.alive
+
+    def reason(self, label, description, vitals, timeout=None):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("down")
+        return f"{self.base_url}: {label}."
+
+
+def test_routes_to_least_outstanding():
+    a, b = FakeClient("a"), FakeClient("b")
+    pool = LLMPool([a, b])
+    busy = pool._acquire([])          # a now has one request in flight
+    assert busy.client is a
+    assert pool.safe_reason("Minor", "walking", {}) == "b: Minor."
+
+
+def test_failover_ejects_and_readmits():
+    bad, good = FakeClient("bad", fail=True), FakeClient("good")
+    pool = LLMPool([bad, good], max_failures=1, eject_s=0.05)
+    assert pool.safe_reason("Minor", "walking", {}) == "good: Minor."
+    assert [s["healthy"] for s in pool.stats()] == [False, True]
+
+    bad.fail = False
+    time.sleep(0.06)
+    pool.safe_reason("Minor", "walking", {})
+    assert [s["healthy"] for s in pool.stats()] == [True, True]
+
+
+def test_all_down_returns_none():
+    pool = LLMPool([FakeClient("a", fail=True)], max_failures=5)
+    assert pool.safe_reason("Minor", "walking", {}) is None
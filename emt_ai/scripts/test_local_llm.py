@@ -0,0 +1,92 @@
+import threading, time
+from concurrent.futures import Future
+from server.local_llm import LocalLLMClient
+
+
+class StubClient(LocalLLMClient):
+    """Batcher with model loading / generation stubbed out (no torch needed)."""
+
+    def __init__(self, fail=False, delay=0.0, **kw):
+        super().__init__(model="stub", **kw)
+        self.batches = []
+        self.fail = fail
+        self.delay = delay
+
+    def _load(self):
+        pass
+
+    def _generate(self, suffixes):
+        self.batches.append(list(suffixes))
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("generate failed")
+        return [f"Reason {i}." for i in range(len(suffixes))]
+
+
+def _concurrent(client, n):
+    out = [None] * n
+
+    def call(i):
+        out[i] = client.safe_reason("Minor", f"case {i}", {})
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return out
+
+
+def test_concurrent_requests_share_one_batch():
+    client = StubClient(batch_window_ms=200)
+    client._ensure_loaded()
+    out = _concurrent(client, 5)
+    assert len(client.batches) == 1 and len(client.batches[0]) == 5
+    assert sorted(out) == sorted(f"Reason {i}." for i in range(5))
+
+
+def test_max_batch_splits_batches():
+    client = StubClient(batch_window_ms=200, max_batch=2)
+    client._ensure_loaded()
+    _concurrent(client, 5)
+    assert [len(b) for b in client.batches] == [2, 2, 1]
+
+
+def test_cancelled_request_is_not_generated():
+    client = StubClient(batch_window_ms=50)
+    dropped, live = Future(), Future()
+    dropped.cancel()
+    client._queue.put(("dropped", dropped))
+    client._queue.put(("live", live))
+    client._ensure_loaded()
+    assert live.result(timeout=2) == "Reason 0."
+    assert client.batches == [["live"]]
+
+
+def test_generate_error_reaches_every_caller():
+    client = StubClient(fail=True, batch_window_ms=100)
+    client._ensure_loaded()
+    assert _concurrent(client, 3) == [None, None, None]
+    assert len(client.batches) == 1
+
+
+def test_caller_timeout_returns_none():
+    client = StubClient(delay=0.5, batch_window_ms=1)
+    assert client.safe_reason("Minor", "walking", {}, timeout=0.05) is None
+
+
+def test_failed_load_is_remembered_until_warm_up():
+    class Flaky(StubClient):
+        loads = 0
+
+        def _load(self):
+            self.loads += 1
+            if self.loads == 1:
+                raise OSError("model files missing")
+
+    client = Flaky()
+    assert client.safe_reason("Minor", "walking", {}) is None
+    assert client.safe_reason("Minor", "walking", {}) is None
+    assert client.loads == 1            # requests do not retry the load
+    assert client.warm_up() is True     # warm-up does, and recovers
+    assert client.loads == 2 and client.is_alive()
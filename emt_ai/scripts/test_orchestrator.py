@@ -0,0 +1,38 @@
+import time
+from orchestrator import Orchestrator, Stage
+
+
+def _sleep_stage(seconds, value):
+    def fn(ctx, remaining_s):
+        time.sleep(seconds)
+        return value
+    return fn
+
+
+def test_optional_stage_times_out_within_budget():
+    orch = Orchestrator()
+    t0 = time.monotonic()
+    ctx = orch.run(100, [Stage("rule", lambda ctx, r: "Minor")],
+                   [Stage("llm", _sleep_stage(1.0, "late"))])
+    assert (time.monotonic() - t0) < 0.5
+    assert ctx["rule"] == "Minor"
+    assert ctx["llm"] is None
+    assert ctx["stages"] == {"rule": "ok", "llm": "timeout"}
+
+
+def test_optional_stage_skipped_when_budget_too_small():
+    ctx = Orchestrator().run(50, [], [Stage("llm", _sleep_stage(0, "x"), min_ms=200)])
+    assert ctx["stages"] == {"llm": "skipped"}
+
+
+def test_optional_stages_complete_and_record_status():
+    def boom(ctx, r):
+        raise RuntimeError("down")
+
+    ctx = Orchestrator().run(500, [Stage("rule", lambda ctx, r: "Delayed")], [
+        Stage("llm", lambda ctx, r: ctx["rule"] + " reason."),
+        Stage("empty", lambda ctx, r: None),
+        Stage("broken", boom),
+    ])
+    assert ctx["llm"] == "Delayed reason."
+    assert ctx["stages"] == {"rule": "ok", "llm": "ok", "empty": "empty", "broken": "error"}
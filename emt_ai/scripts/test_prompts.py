@@ -0,0 +1,35 @@
+import pytest
+from server.prompts import CASE_MARKER, load_template, parse_template
+
+SUFFIX = "Label: {label}\nDescription: {description}\nVitals: {vitals}"
+
+
+def test_shipped_template_splits_and_renders():
+    t = load_template("v1")
+    assert CASE_MARKER not in t.prefix and "{" not in t.prefix
+    out = t.render("Minor", "walking", {"resp_rate": 18})
+    assert out.startswith(t.prefix) and out.endswith("Vitals: {'resp_rate': 18}")
+
+
+def test_missing_marker_rejected():
+    with pytest.raises(ValueError, match="separator"):
+        parse_template("t", "Explain the label.\n" + SUFFIX)
+
+
+def test_empty_prefix_rejected():
+    with pytest.raises(ValueError, match="empty prefix"):
+        parse_template("t", f"\n{CASE_MARKER}\n{SUFFIX}")
+
+
+@pytest.mark.parametrize("suffix", [
+    "Label: {label}\nDescription: {description}",                        # missing field
+    SUFFIX + "\nAge: {age}",                                             # unknown field
+])
+def test_wrong_suffix_fields_rejected(suffix):
+    with pytest.raises(ValueError, match="suffix fields"):
+        parse_template("t", f"Explain the label.\n{CASE_MARKER}\n{suffix}")
+
+
+def test_placeholder_in_prefix_rejected():
+    with pytest.raises(ValueError, match="static prefix"):
+        parse_template("t", f"Explain why {{label}} fits.\n{CASE_MARKER}\n{SUFFIX}")
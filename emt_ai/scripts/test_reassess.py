@@ -0,0 +1,55 @@
+import asyncio
+from server.reassess import ReassessScheduler, EventHub, run_timer_loop
+
+INTERVALS = {"Immediate": 120, "Delayed": 600, "Minor": 1800, "Expectant": 900}
+
+
+def test_fires_in_due_order_and_rearms():
+    s = ReassessScheduler(INTERVALS)
+    s.schedule("p1", "Delayed", now=0)
+    s.schedule("p2", "Immediate", now=0)
+    assert s.pop_due(now=100) == []
+    events = s.pop_due(now=120)
+    assert [e["patient_id"] for e in events] == ["p2"]
+    assert s.next_due() == 240          # re-armed for the next 2 minutes
+    assert [e["patient_id"] for e in s.pop_due(now=600)] == ["p2", "p1"]
+
+
+def test_retriage_reschedules_and_cancel_removes():
+    s = ReassessScheduler(INTERVALS)
+    s.schedule("p1", "Delayed", now=0)
+    s.schedule("p1", "Immediate", now=10)   # deteriorated
+    assert len(s) == 1
+    assert [(e["patient_id"], e["triage_level"]) for e in s.pop_due(now=130)] == [("p1", "Immediate")]
+    assert s.cancel("p1") and not s.cancel("p1")
+    assert s.pop_due(now=10_000) == [] and s.next_due() is None
+
+
+def test_stale_entries_are_compacted():
+    s = ReassessScheduler(INTERVALS)
+    for i in range(1000):
+        s.schedule("p", "Minor", now=i)
+    assert len(s) == 1 and len(s._heap) <= 130
+
+
+def test_timer_loop_survives_a_failing_tick():
+    class Flaky(ReassessScheduler):
+        calls = 0
+
+        def pop_due(self, now=None, limit=1000):
+            self.calls += 1
+            if self.calls == 1:
+                raise RuntimeError("boom")
+            return super().pop_due(now, limit)
+
+    async def run():
+        s, hub = Flaky(INTERVALS), EventHub()
+        q = hub.subscribe()
+        s.schedule("p1", "Immediate", now=0)   # long overdue
+        task = asyncio.ensure_future(run_timer_loop(s, hub, max_sleep=0.01))
+        try:
+            return await asyncio.wait_for(q.get(), 2)
+        finally:
+            task.cancel()
+
+    assert asyncio.run(run())["patient_id"] == "p1"
@@ -0,0 +1,43 @@
+import sys
+from server.registry import HISTORY, PatientRegistry, input_key
+
+
+def test_unchanged_inputs_reuse_record():
+    reg = PatientRegistry()
+    k1 = input_key("Walking, small cuts", 18, "strong", "<2", "v1")
+    reg.update("T-1", k1, "Minor", "ambulatory", "Ambulatory.", 0.9, 18, "strong", "<2", now=0)
+    assert reg.unchanged("T-1", input_key("walking,  small cuts", 18, "Strong", "<2", "v1")) is not None
+    assert reg.unchanged("T-1", input_key("Walking, small cuts", 34, "strong", "<2", "v1")) is None
+    assert reg.unchanged("T-1", input_key("Walking, small cuts", 18, "strong", "<2", "v2")) is None
+
+
+def test_llm_reasoning_provenance():
+    reg = PatientRegistry()
+    rec = reg.update("T-3", 1, "Minor", "ambulatory", " ambulatory.", 0.9, now=0)
+    assert rec.llm_reasoning is False          # rule fallback: LLM worth retrying
+    reg.set_reasoning(rec, "Walking with stable vitals suggests minor injuries.")
+    assert rec.llm_reasoning and rec.reasoning.startswith("Walking")
+    rec = reg.update("T-3", 2, "Minor", "ambulatory", " ambulatory.", 0.9, now=1)
+    assert rec.llm_reasoning is False
+
+
+def test_transitions_and_vitals_ring():
+    reg = PatientRegistry()
+    reg.update("T-2", 1, "Delayed", "default", "Stable.", 0.7, 20, "strong", "<2", now=100)
+    for i in range(HISTORY + 3):
+        reg.update("T-2", 2 + i, "Immediate", "RR > 30", "Fast breathing.", 0.9, 31 + i, "weak", ">2",
+                   now=200 + i)
+    rec = reg.get("T-2").to_dict()
+    assert rec["transitions"] == [{"ts": 200, "from": "Delayed", "to": "Immediate"}]
+    vitals = rec["vitals"]
+    assert len(vitals) == HISTORY
+    assert [v["resp_rate"] for v in vitals] == [31 + i for i in range(3, HISTORY + 3)]
+    assert vitals[-1]["pulse"] == "weak" and vitals[-1]["cap_refill"] == 2.01
+    assert reg.summary()["by_level"]["Immediate"] == 1
+
+
+def test_record_is_compact():
+    reg = PatientRegistry()
+    rec = reg.update("T-3", 1, "Minor", "ambulatory", "Ambulatory.", 0.9, 18, "strong", "<2", now=0)
+    assert not hasattr(rec, "__dict__")
+    assert sys.getsizeof(rec) + sys.getsizeof(rec._ring) < 400
@@ -0,0 +1,107 @@
+import json, os
+import pytest
+from rule_engine import RULES_PATH, RuleEngine, RuleTableError, compile_table
+
+
+def table():
+    return json.loads(RULES_PATH.read_text(encoding="utf-8"))
+
+
+def test_shipped_table_matches_golden():
+    engine = RuleEngine()
+    assert engine.version.startswith("start-v1+")
+    assert engine.decide("No breathing, no pulse", 0, "none", ">2") == ("Expectant", "no breathing + no pulse")
+    assert engine.decide("Heavy bleeding from thigh", 24, "strong", "<2")[0] == "Immediate"
+
+
+def test_missing_pulse_is_not_no_pulse():
+    decide = compile_table(table())
+    assert decide("Not breathing", None, None, None)[0] == "Immediate"
+    assert decide("Not breathing", None, "absent", None)[0] == "Expectant"
+
+
+def test_cross_group_keyword_prefix_rejected():
+    t = table()
+    t["keywords"]["ambulatory"].append("no breathing today")
+    with pytest.raises(RuleTableError):
+        compile_table(t)
+
+
+def test_hot_reload_and_rejects_bad_table(tmp_path):
+    t = table()
+    t["golden"] = []
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps(t))
+    engine = RuleEngine(path, check_interval_s=0)
+    first = engine.version
+    assert engine.decide("walking", 18)[0] == "Minor"
+
+    t["version"] = "start-v2"
+    t["keywords"]["ambulatory"] = ["limping"]
+    path.write_text(json.dumps(t))
+    os.utime(path, (1, 1))
+    assert engine.decide("walking", 18)[0] == "Delayed"
+    assert engine.version.startswith("start-v2+") and engine.version != first
+
+    t["rules"][0]["label"] = "Urgent"
+    path.write_text(json.dumps(t))
+    os.utime(path, (2, 2))
+    assert engine.decide("limping", 18)[0] == "Minor"    # bad table rejected, v2 keeps serving
+    assert engine.version.startswith("start-v2+")
+
+
+def _break(t, what):
+    if what == "reason":
+        del t["rules"][0]["reason"]
+    elif what == "threshold":
+        del t["thresholds"]["resp_rate_max"]
+    elif what == "golden":
+        t["golden"] = ["scripts/no_such_cases.json"]
+    elif what == "rules-type":
+        t["rules"] = [["Immediate"]]
+
+
+@pytest.mark.parametrize("what", ["reason", "threshold", "golden", "rules-type"])
+def test_reload_reports_malformed_table_as_rule_table_error(tmp_path, what):
+    t = table()
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps(t))
+    engine = RuleEngine(path)
+    good = engine.version
+
+    _break(t, what)
+    path.write_text(json.dumps(t))
+    with pytest.raises(RuleTableError):
+        engine.reload()
+    assert engine.version == good
+
+
+def test_pulse_set_names_are_not_identifiers():
+    t = table()
+    t["pulse"]["very-weak"] = ["thready"]
+    t["rules"].insert(0, {"when": ["pulse:very-weak"], "label": "Immediate", "reason": "thready pulse"})
+    decide = compile_table(t)
+    assert decide("pale", 20, "thready", "<2") == ("Immediate", "thready pulse")
+    assert decide("walking", 18, "strong", "<2")[0] == "Minor"
+
+
+def test_learned_signals_only_up_triage():
+    decide = compile_table(table())
+    # would be Expectant / Minor if the signals were trusted like keywords
+    assert decide("Unresponsive", 8, "weak", "<2", frozenset({"apnea"}))[0] == "Immediate"
+    assert decide("Broken arm, follows commands", 20, "strong", "<2", frozenset({"ambulatory"}))[0] == "Delayed"
+    # mental may raise Delayed or Minor to Immediate; groups not listed in
+    # learned_signals (bleeding) are ignored
+    assert decide("Sprained wrist", 20, "strong", "<2", frozenset({"bleeding"}))[0] == "Delayed"
+    assert decide("Walking, dazed", 18, "strong", "<2", frozenset({"mental"}))[0] == "Immediate"
+    # and never touch an Expectant call
+    assert decide("No breathing, no pulse", 0, "none", ">2", frozenset({"mental"}))[0] == "Expectant"
+
+
+def test_use_signals_requires_golden_pass():
+    engine = RuleEngine()
+    with pytest.raises(RuleTableError):
+        engine.use_signals(lambda text: frozenset({"mental"}))   # up-triages every Minor
+    assert engine.signals is None
+    engine.use_signals(lambda text: frozenset())
+    assert engine.signals is not None
@@ -0,0 +1,67 @@
+import pytest
+from safety import SafetyFilter, scan, check_batch
+
+
+def test_scan_categories():
+    assert scan("RR 34/min (>30) indicates respiratory compromise; prioritize immediate care.") is None
+    assert scan("Give aspirin for chest pain.").category == "drug"
+    assert scan("Administer 0.3 mg now.").category == "dose"
+    assert scan("Prepare for Intubation.").category == "invasive"
+
+
+def test_check_batch():
+    hits = check_batch(["Ambulatory with stable vitals.", "Start IV fluids.", ""])
+    assert hits[0] is None and hits[1].term.lower() == "iv fluids" and hits[2] is None
+
+
+def test_stream_catches_term_split_across_tokens():
+    s = SafetyFilter().scanner()
+    for tok in ["Weak pulse; consider ", "mor", "phi", "ne for pain."]:
+        if s.feed(tok):
+            break
+    assert s.hit is not None and s.hit.term == "morphine"
+
+
+def test_stream_waits_for_word_boundary():
+    s = SafetyFilter().scanner()
+    assert s.feed("Pale, iv") is None            # could still become "ivory"
+    assert s.feed("ory skin tone.") is None
+    assert s.close() is None
+
+    s = SafetyFilter().scanner()
+    assert s.feed("Give 5") is None
+    assert s.feed(" mg") is None
+    assert s.close().category == "dose"
+
+
+@pytest.mark.parametrize("text,category", [
+    ("Patient should be intubated.", "invasive"),
+    ("Start an IV.", "invasive"),
+    ("Insert chest tubes.", "invasive"),
+    ("Sutured wound on the arm.", "invasive"),
+    ("Needs catheterization.", "invasive"),
+    ("Injecting fluids helps.", "invasive"),
+    ("Give 2 tablets of tylenol.", "dose"),
+    ("Take two pills now.", "dose"),
+    ("Give Advil.", "drug"),
+    ("Offer tylenol for pain.", "drug"),
+    ("Give painkillers.", "drug"),
+])
+def test_inflections_brands_and_dose_forms_blocked(text, category):
+    assert scan(text).category == category
+
+
+@pytest.mark.parametrize("text", [
+    "No medications needed; stable vitals suggest minor injuries.",
+    "Ambulatory with stable vitals suggests minor injuries suitable for delayed treatment.",
+    "Bleeding controlled with direct pressure; stable vitals indicate delayed priority.",
+    "Divided attention and vivid recall suggest intact mental status.",
+])
+def test_compliant_sentences_pass(text):
+    assert scan(text) is None
+
+
+def test_stream_waits_for_inflected_ending():
+    s = SafetyFilter().scanner()
+    assert s.feed("Should be intubat") is None
+    assert s.feed("ed at once.").term == "intubated"
@@ -1,4 +1,9 @@
-from test_start_engine import start_triage
+from start_engine import start_triage
+
+
+def triage(c):
+    v = c["vitals"]
+    return start_triage(c["description"], v["resp_rate"], v["pulse"], v["cap_refill"])
 
 def case(desc, rr=None, pulse="strong", cr="<2"):
     return {
@@ -8,20 +13,20 @@ def case(desc, rr=None, pulse="strong", cr="<2"):
 
 def test_immediate_rr_over_30():
     c = case("Breathing fast", rr=31, pulse="strong", cr="<2")
-    assert start_triage(c) == "Immediate"
+    assert triage(c) == "Immediate"
 
 def test_immediate_poor_perfusion():
     c = case("Looks pale", rr=20, pulse="weak", cr=">2")
-    assert start_triage(c) == "Immediate"
+    assert triage(c) == "Immediate"
 
 def test_minor_ambulatory():
     c = case("Walking with small cuts", rr=18, pulse="strong", cr="<2")
-    assert start_triage(c) == "Minor"
+    assert triage(c) == "Minor"
 
 def test_expectant_no_breathing_after_airway():
     c = case("No breathing even after airway reposition", rr=0, pulse="none", cr=">2")
-    assert start_triage(c) == "Expectant"
+    assert triage(c) == "Expectant"
 
 def test_delayed_default():
     c = case("Open arm fracture, stable, follows commands", rr=20, pulse="strong", cr="<2")
-    assert start_triage(c) == "Delayed"
+    assert triage(c) == "Delayed"
@@ -0,0 +1,37 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+from text_signals import SIGNALS, DIM, SignalModel, featurize  # noqa: E402
+
+
+def test_featurize_is_stable_and_in_range():
+    f = featurize("25F, not responding, RR 28")
+    assert f == featurize("25f, NOT responding, rr 28")
+    assert all(0 <= i < DIM for i in f)
+
+
+def test_batch_matches_single():
+    rng = np.random.default_rng(0)
+    model = SignalModel(rng.normal(size=(DIM, len(SIGNALS))), rng.normal(size=len(SIGNALS)), SIGNALS)
+    texts = ["walking unaided, small cuts", "", "apneic despite airway, RR 0"]
+    batch = model.predict_batch(texts)
+    for row, t in zip(batch, texts):
+        single = model.predict(t)
+        assert np.allclose(row, [single[s] for s in SIGNALS], atol=1e-5)
+
+
+def test_shipped_model_passes_golden_and_catches_keyword_misses():
+    from text_signals import load_default
+    from rule_engine import RuleEngine
+
+    model = load_default()
+    assert model is not None, "run scripts/train_text_signals.py"
+    engine = RuleEngine()
+    threshold = 0.9  # server default (TRIAGE_SIGNAL_THRESHOLD)
+    engine.use_signals(lambda text: model.confident(text, threshold))  # raises on any golden miss
+
+    # misspelt / rephrased mental status the keyword lists do not match
+    for desc in ("35M, unconcious, RR 20", "won't follow commands, RR 24"):
+        assert engine.decide(desc, 20, "strong", "<2")[0] == "Delayed"
+        assert engine.decide(desc, 20, "strong", "<2", engine.signals(desc))[0] == "Immediate"
+    assert engine.signals("calm and responsive, RR 20") == frozenset()
@@ -0,0 +1,180 @@
+# scripts/train_text_signals.py
+"""
+Train the hashed n-gram signal classifier (text_signals.py) and write
+model/signals/text_signals_v2.npz plus an accuracy/latency report.
+
+Run from emt_ai/:  python scripts/train_text_signals.py
+"""
+import json, pathlib, random, sys, time
+
+import numpy as np
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from text_signals import SIGNALS, DIM, SignalModel, featurize_batch, _sigmoid  # noqa: E402
+from rule_engine import RULES_PATH, RuleEngine, check_golden, _keyword_matcher, parse_cap_refill  # noqa: E402
+
+CASES = [ROOT / "scripts" / "cases.json", ROOT / "scripts" / "datasets" / "cases_expanded.json"]
+TRAIN_JSONL = ROOT / "scripts" / "datasets" / "train.jsonl"
+REPORT = ROOT / "model" / "signals" / "text_signals_v2.report.json"
+THRESHOLD = 0.9  # server default (TRIAGE_SIGNAL_THRESHOLD)
+
+# Field-style descriptions the keyword lists miss (typos, other phrasing), with
+# otherwise normal vitals; the report shows what the learned tier makes of them.
+PROBES = [
+    "35M, unconcious, RR 20",
+    "unresposive after fall, RR 22",
+    "nonresponsive, RR 18",
+    "won't follow commands, RR 24",
+    "calm and responsive, RR 20",
+]
+
+
+def load_cases():
+    seen, out = set(), []
+    for p in CASES:
+        for c in json.loads(p.read_text(encoding="utf-8")):
+            out.append((c["description"], c.get("vitals") or {}, c["expected_triage"]))
+    for line in TRAIN_JSONL.read_text(encoding="utf-8").splitlines():
+        row = json.loads(line)
+        desc, vitals = "", {}
+        for part in row["input"].splitlines():
+            if part.startswith("Description: "):
+                desc = part[len("Description: "):]
+            elif part.startswith("Vitals: "):
+                vitals = json.loads(part[len("Vitals: "):])
+        out.append((desc, vitals, row["meta"]["label"]))
+    # the same case often appears in several files
+    uniq = []
+    for c in out:
+        key = c[0].strip().lower()
+        if key not in seen:
+            seen.add(key)
+            uniq.append(c)
+    return uniq
+
+
+def targets(cases):
+    """
+    Weak labels: the rule table's keyword groups, plus what the expected label
+    implies when the vitals alone don't explain it (an Immediate with normal
+    vitals must be mental status or bleeding; Minor means ambulatory; ...).
+    """
+    match = _keyword_matcher(json.loads(RULES_PATH.read_text(encoding="utf-8"))["keywords"])
+    Y = np.zeros((len(cases), len(SIGNALS)), dtype=np.float32)
+    for i, (desc, v, label) in enumerate(cases):
+        s = set(match(desc.lower()))
+        rr, pulse, cr = v.get("resp_rate"), (v.get("pulse") or "").lower(), parse_cap_refill(v.get("cap_refill"))
+        vitals_explain = (rr is not None and rr > 30) or (cr is not None and cr > 2) or pulse in {"weak", "none", "absent"}
+        if label == "Immediate" and not vitals_explain and "bleed" not in desc.lower() and "apnea" not in s:
+            s.add("mental")
+        if label == "Minor":
+            s.add("ambulatory")
+        if label == "Expectant" or rr == 0:
+            s.add("apnea")
+        Y[i] = [1.0 if sig in s else 0.0 for sig in SIGNALS]
+    return Y
+
+
+def train(texts, Y, epochs=400, lr=0.5, l2=1e-4):
+    idx, rows = featurize_batch(texts, DIM)
+    n, k = Y.shape
+    # positives are rare (18 of 182 for mental); weight them up to the negatives
+    # so the model is confident on them instead of hovering near 0.5
+    pos = Y.sum(axis=0)
+    weight = np.where(Y > 0, (n - pos) / np.maximum(pos, 1), 1.0).astype(np.float32)
+    W = np.zeros((DIM, k), dtype=np.float32)
+    b = np.zeros(k, dtype=np.float32)
+    for _ in range(epochs):
+        g = W[idx]
+        z = np.stack([np.bincount(rows, weights=g[:, j], minlength=n) for j in range(k)], axis=1) + b
+        err = weight * (_sigmoid(z) - Y) / n
+        gW = np.zeros_like(W)
+        np.add.at(gW, idx, err[rows])
+        W -= lr * (gW + l2 * W)
+        b -= lr * err.sum(axis=0)
+    return SignalModel(W, b, SIGNALS)
+
+
+def evaluate(model, texts, Y):
+    P = model.predict_batch(texts) >= 0.5
+    rep = {}
+    for j, sig in enumerate(SIGNALS):
+        y, p = Y[:, j] > 0.5, P[:, j]
+        tp = int((y & p).sum())
+        rep[sig] = {
+            "accuracy": round(float((y == p).mean()), 4),
+            "precision": round(tp / max(1, int(p.sum())), 4),
+            "recall": round(tp / max(1, int(y.sum())), 4),
+            "positives": int(y.sum()),
+        }
+    return rep
+
+
+def latency(model, texts, reps=2000):
+    t0 = time.perf_counter()
+    for i in range(reps):
+        model.predict(texts[i % len(texts)])
+    single = (time.perf_counter() - t0) / reps * 1e6
+    batch = (texts * (1000 // len(texts) + 1))[:1000]
+    t0 = time.perf_counter()
+    model.predict_batch(batch)
+    per = (time.perf_counter() - t0) / len(batch) * 1e6
+    return {"single_us": round(single, 2), "batch1000_us_per_description": round(per, 2)}
+
+
+def golden(model):
+    """
+    The server only enables the model if the rules still pass every golden
+    case with its signals applied (RuleEngine.use_signals); check that here
+    too, and count how many golden decisions the signals change at all.
+    """
+    engine = RuleEngine()
+    signals = lambda text: model.confident(text, THRESHOLD)  # noqa: E731
+    cases = []
+    for rel in json.loads(RULES_PATH.read_text(encoding="utf-8"))["golden"]:
+        cases += json.loads((ROOT / rel).read_text(encoding="utf-8"))
+
+    def args(c):
+        v = c.get("vitals") or {}
+        return c["description"], v.get("resp_rate"), v.get("pulse"), v.get("cap_refill")
+
+    errors = check_golden(engine.decide, cases, signals)
+    changed = sum(engine.decide(*args(c)) != engine.decide(*args(c), signals(c["description"])) for c in cases)
+    probes = {}
+    for desc in PROBES:
+        vitals = (20, "strong", "<2")
+        probes[desc] = {
+            "scores": {k: round(p, 3) for k, p in model.predict(desc).items()},
+            "rules_only": engine.decide(desc, *vitals)[0],
+            "with_signals": engine.decide(desc, *vitals, signals(desc))[0],
+        }
+    return {"threshold": THRESHOLD, "cases": len(cases), "errors_with_signals": len(errors),
+            "decisions_changed": changed, "keyword_misses": probes}, errors
+
+
+def main():
+    cases = load_cases()
+    random.Random(7).shuffle(cases)
+    texts = [c[0] for c in cases]
+    Y = targets(cases)
+    cut = int(len(cases) * 0.8)
+
+    held_out = train(texts[:cut], Y[:cut])
+    report = {
+        "cases": len(cases),
+        "held_out": evaluate(held_out, texts[cut:], Y[cut:]),
+    }
+    model = train(texts, Y)  # final model sees everything
+    report["latency"] = latency(model, texts)
+    report["golden"], errors = golden(model)
+    print(json.dumps(report, indent=2))
+    if errors:
+        # the server would refuse this model; keep the previous one
+        raise SystemExit(f"not saved: {len(errors)} golden case(s) fail with signals, first: {errors[0]}")
+    model.save()
+    REPORT.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,71 @@
 # server/app.py
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
 from typing import Optional
-import sys, pathlib
-import requests
+import os, threading, time, logging, asyncio, contextlib
 from typing import List
 from datetime import datetime
 
+from server.llm_client import LLMClient
+from server import db
+from server.reassess import ReassessScheduler, EventHub, run_timer_loop
+from server.registry import PatientRegistry, input_key
+from orchestrator import Orchestrator, Stage
+from rule_engine import RuleEngine, RuleTableError
+import safety
 
+logger = logging.getLogger(__name__)
 
 
-# Make sure 'scripts' is on path BEFORE importing
-sys.path.append(str(pathlib.Path(__file__).resolve().parents[1] / "scripts"))
-from scripts.start_engine import start_triage  # noqa: E402
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    # the helpers are defined in their sections below
+    start_warm_up()
+    start_reassess_timers()
+    yield
+    _timer_task.cancel()
 
-from server.llm_client import LLMClient  # noqa: E402
 
-app = FastAPI(title="Emergency Triage (Offline)")
-llm = LLMClient()  # default model = phi3:mini (change via env TRIAGE_LLM_MODEL)
+app = FastAPI(title="Emergency Triage (Offline)", lifespan=lifespan)
+# TRIAGE_LLM_BACKEND=local runs a small HF model in-process instead of Ollama
+if os.getenv("TRIAGE_LLM_BACKEND", "ollama") == "local":
+    # imported here so the Ollama path never loads torch/transformers
+    from server.local_llm import LocalLLMClient, DEFAULT_LOCAL_MODEL
+    llm = LocalLLMClient(model=os.getenv("TRIAGE_LOCAL_MODEL", DEFAULT_LOCAL_MODEL))
+elif os.getenv("TRIAGE_LLM_URLS"):
+    # several Ollama boxes: TRIAGE_LLM_URLS=http://10.0.0.2:11434,http://10.0.0.3:11434
+    from server.llm_pool import LLMPool
+    llm = LLMPool.from_urls([u.strip() for u in os.environ["TRIAGE_LLM_URLS"].split(",") if u.strip()])
+else:
+    llm = LLMClient()  # default model = phi3:mini (change via env TRIAGE_LLM_MODEL)
+
+# START rules from model/rules/start_rules.json; reloaded when the file changes
+rules = RuleEngine()
+
+# Learned text-signal tier (model/signals/text_signals_v2.npz); disabled if
+# the model has not been trained, NumPy is missing, or the rules with its
+# signals applied miss any golden case. Signals can only up-triage.
+SIGNAL_THRESHOLD = float(os.getenv("TRIAGE_SIGNAL_THRESHOLD", "0.9"))
+try:
+    from text_signals import load_default as _load_signal_model
+    signal_model = _load_signal_model()
+except ImportError:
+    signal_model = None
+if signal_model is not None:
+    try:
+        rules.use_signals(lambda text: signal_model.confident(text, SIGNAL_THRESHOLD))
+    except RuleTableError as e:
+        logger.warning("text-signal model %s disabled: %s", signal_model.version, e)
+        signal_model = None
+
+# End-to-end latency budget per /triage call (clients may send their own budget_ms).
+# Optional stages are skipped when less than their min_ms is left; 400 ms keeps
+# the answer interactive and leaves room for a warm LLM sentence.
+DEFAULT_BUDGET_MS = float(os.getenv("TRIAGE_BUDGET_MS", "400"))
+LLM_MIN_MS = float(os.getenv("TRIAGE_LLM_MIN_MS", "150"))
+orchestrator = Orchestrator()
 
 # CORS (for local UI)
 app.add_middleware(
@@ -38,6 +85,8 @@ class Vitals(BaseModel):
 class TriageIn(BaseModel):
     description: str
     vitals: Optional[Vitals] = None
+    budget_ms: Optional[float] = Field(None, gt=0)  # end-to-end latency budget; default TRIAGE_BUDGET_MS
+    patient_id: Optional[str] = None   # triage tag id; enables reassessment timers
 
 # ------------------ demo actions ------------------
 ACTIONS = {
@@ -68,54 +117,149 @@ ACTIONS = {
     ],
 }
 
+# ------------------ startup / readiness ------------------
+# Filled in by the warm-up thread; /ready reports it, /health never waits on it.
+STARTUP = {"ready": False, "llm_warm": False, "warmup_s": None, "warmup_attempts": 0}
+
+# /ready stays 503 until the LLM is warm; TRIAGE_REQUIRE_LLM=0 accepts
+# rule-only reasoning as ready once the first attempt has finished.
+REQUIRE_LLM = os.getenv("TRIAGE_REQUIRE_LLM", "1") != "0"
+WARMUP_RETRY_S = (2.0, 60.0)  # first retry delay, cap (doubles in between)
+
+
+def _warm_up_once() -> bool:
+    try:
+        return bool(llm.warm_up())
+    except Exception as e:  # never let warm-up take the server down
+        logger.warning("warm-up failed: %s", e)
+        return False
+
+
+def _warm_up(sleep=time.sleep):
+    t0 = time.perf_counter()
+    delay, cap = WARMUP_RETRY_S
+    while True:
+        STARTUP["warmup_attempts"] += 1
+        STARTUP["llm_warm"] = _warm_up_once()
+        STARTUP["warmup_s"] = round(time.perf_counter() - t0, 2)
+        STARTUP["ready"] = STARTUP["llm_warm"] or not REQUIRE_LLM
+        if STARTUP["llm_warm"]:
+            return
+        logger.info("LLM still cold after %d warm-up attempt(s); retrying in %.0fs",
+                    STARTUP["warmup_attempts"], delay)
+        sleep(delay)
+        delay = min(delay * 2, cap)
+
+
+def start_warm_up():
+    # background thread: liveness answers at once while the model loads
+    threading.Thread(target=_warm_up, name="llm-warmup", daemon=True).start()
+
+
+# ------------------ tracked patients ------------------
+registry = PatientRegistry()
+
+# ------------------ reassessment timers ------------------
+reassess = ReassessScheduler()
+reassess_hub = EventHub()
+
+
+# the event loop only keeps a weak reference to tasks; hold ours here
+_timer_task: Optional[asyncio.Task] = None
+
+
+def start_reassess_timers():
+    global _timer_task
+    _timer_task = asyncio.get_running_loop().create_task(run_timer_loop(reassess, reassess_hub))
+
+
 @app.get("/health")
 def health():
     return {"ok": True, "offline": True}
 
+
+@app.get("/ready")
+def ready():
+    # 503 while the LLM is cold (unless TRIAGE_REQUIRE_LLM=0); /triage still
+    # answers meanwhile, with rule-only reasoning
+    return JSONResponse(STARTUP, status_code=200 if STARTUP["ready"] else 503)
+
+
+@app.get("/llm/backends")
+def llm_backends():
+    # per-instance health / load / latency when running an LLMPool
+    stats = getattr(llm, "stats", None)
+    return stats() if stats else [{"backend": getattr(llm, "base_url", getattr(llm, "model", "local")),
+                                   "healthy": llm.is_alive()}]
+
 # Store last N cases in memory
 RECENT_CASES: List[dict] = []
 
 # ------------------ main triage endpoint ------------------
-# ------------------ main triage endpoint ------------------
+def _stage_signals(ctx, remaining_s):
+    # learned tier: confident text signals the keyword lists may have missed
+    if rules.signals is None:
+        return frozenset()
+    return rules.signals(ctx["inp"].description)
+
+
+def _stage_rule(ctx, remaining_s):
+    inp, v = ctx["inp"], ctx["vitals"]
+    label, why = rules.decide(inp.description, v.resp_rate, v.pulse, v.cap_refill, ctx["signals"])
+    return {"label": label, "why": why, "rules_version": rules.version}
+
+
+def _stage_llm(ctx, remaining_s):
+    v = ctx["vitals"]
+    vitals_dict = {"resp_rate": v.resp_rate, "pulse": v.pulse, "cap_refill": v.cap_refill}
+    # returns None if the backend is down; never waits past the budget
+    text = llm.safe_reason(ctx["rule"]["label"], ctx["inp"].description, vitals_dict, timeout=remaining_s)
+    hit = safety.scan(text) if text else None
+    if hit is not None:
+        # the clients already filter; this also covers any backend that doesn't
+        logger.warning("LLM reason blocked by safety filter (%s: %r)", hit.category, hit.term)
+        return None
+    return text
+
+
+REQUIRED_STAGES = [Stage("signals", _stage_signals), Stage("rule", _stage_rule)]
+OPTIONAL_STAGES = [Stage("llm", _stage_llm, min_ms=LLM_MIN_MS)]
+
+
 @app.post("/triage")
-def triage(inp: TriageIn):
+def triage(inp: TriageIn, x_triage_replay: Optional[str] = Header(None)):
     v = inp.vitals or Vitals()
+    budget_ms = DEFAULT_BUDGET_MS if inp.budget_ms is None else inp.budget_ms
 
-    label = start_triage(inp.description, v.resp_rate, v.pulse, v.cap_refill)
-
-    # reason (rule or LLM)
-    d = (inp.description or "").lower().strip()
-    cap_str = str(v.cap_refill).strip().lower() if v.cap_refill is not None else ""
-    why = (
-        "no breathing + no pulse"
-        if (("no breathing" in d or "not breathing" in d or (v.resp_rate == 0))
-            and (v.pulse or "").lower() in {"none", "absent"})
-        else "RR > 30" if (v.resp_rate is not None and v.resp_rate > 30)
-        else "capillary refill > 2s" if (
-            (cap_str.startswith(">") and cap_str[1:].replace(".","",1).isdigit() and float(cap_str[1:]) >= 2)
-            or (cap_str.replace(".","",1).isdigit() and float(cap_str) > 2)
-        )
-        else "poor perfusion / mental status" if (
-            (v.pulse or "").lower() in {"weak", "none", "absent"}
-            or any(k in d for k in ["unresponsive", "cannot follow commands", "unconscious"])
-        )
-        else "ambulatory" if any(k in d for k in [
-            "walking", "ambulatory", "moving independently", "walking unaided"
-        ])
-        else "default"
-    )
-
-    # NEW: build vitals dict and ask the local LLM for a short reason
-    vitals_dict = {
-        "resp_rate": v.resp_rate,
-        "pulse": v.pulse,
-        "cap_refill": v.cap_refill,
-    }
-    llm_reason = llm.safe_reason(label, inp.description, vitals_dict)  # returns None if Ollama down
-    reason_text = llm_reason or f" {why}."            # fallback to rule reason
+    # re-triage of a tracked patient with unchanged inputs reuses the last result
+    key = cached = None
+    if inp.patient_id:
+        key = input_key(inp.description, v.resp_rate, v.pulse, v.cap_refill, rules.version)
+        cached = registry.unchanged(inp.patient_id, key)
+
+    if cached is not None:
+        registry.touch(cached)
+        label, why, reason_text, conf = cached.level, cached.reason, cached.reasoning, cached.confidence
+        stages, elapsed = {"cached": "ok"}, 0.0
+        if not cached.llm_reasoning:
+            # the stored sentence is the rule fallback (LLM cold, slow or
+            # blocked last time): the label stands, only the LLM is retried
+            llm_ctx = orchestrator.run(budget_ms, [], OPTIONAL_STAGES,
+                                       {"inp": inp, "vitals": v, "rule": {"label": label}})
+            stages.update(llm_ctx["stages"])
+            elapsed = llm_ctx["elapsed_ms"]
+            if llm_ctx["llm"]:
+                reason_text = llm_ctx["llm"]
+                registry.set_reasoning(cached, reason_text)
+        ctx = {"rule": {"rules_version": rules.version}, "signals": cached.signals, "stages": stages,
+               "elapsed_ms": elapsed}
+    else:
+        ctx = orchestrator.run(budget_ms, REQUIRED_STAGES, OPTIONAL_STAGES, {"inp": inp, "vitals": v})
+        label, why = ctx["rule"]["label"], ctx["rule"]["why"]
+        reason_text = ctx["llm"] or f" {why}."            # fallback to rule reason
 
-    # NEW: confidence from rule signal strength
-    conf = confidence_from_rule(why, v)
+        # NEW: confidence from rule signal strength
+        conf = confidence_from_rule(why, v)
 
     result = {
         "triage_level": label,
@@ -123,24 +267,125 @@ def triage(inp: TriageIn):
         "reasoning": reason_text,
         "disclaimer": "Support tool only; not a substitute for professional medical judgment.",
         "confidence": conf,
+        "rules_version": ctx["rule"]["rules_version"],
+        "learned_signals": sorted(ctx["signals"]),
+        "stages": ctx["stages"],            # which stages completed within the budget
+        "budget_ms": budget_ms,
+        "elapsed_ms": ctx["elapsed_ms"],
         "ts": datetime.utcnow().isoformat(),   # NEW
         "raw": inp.dict(),  # optional: store original input
-# optional: store original input
     }
 
-    RECENT_CASES.insert(0, result)
-    if len(RECENT_CASES) > 20:
-        RECENT_CASES.pop()
+    # replays (scripts/replay_cases.py --target app) must not re-log old cases
+    if not x_triage_replay:
+        RECENT_CASES.insert(0, result)
+        if len(RECENT_CASES) > 20:
+            RECENT_CASES.pop()
+
+        # full incident log (sqlite) for export / replay; the row is queued
+        # for a background writer, so a slow or locked database never holds
+        # up the answer, and a failure here must not cost the caller it
+        try:
+            db.log_case(inp.description, v.resp_rate, v.pulse, v.cap_refill, label, reason_text)
+        except Exception as e:
+            logger.error("case log write failed (%s): %s", db.DB_PATH, e)
+
+    if inp.patient_id:
+        if cached is None:
+            rec = registry.update(inp.patient_id, key, label, why, reason_text, conf,
+                                  v.resp_rate, v.pulse, v.cap_refill, llm_reasoning=bool(ctx["llm"]),
+                                  signals=ctx["signals"])
+            if rec.transitions and rec.transitions[-1][0] == rec.last_seen:
+                result["previous_level"] = rec.transitions[-1][1]
+        # re-triage restarts the timer at the (possibly new) level's interval
+        result["reassess_due"] = reassess.schedule(inp.patient_id, label)
 
     return result
 
 
+# ------------------ reassessment ------------------
+@app.get("/reassess")
+def reassess_upcoming(limit: int = 50):
+    return {"tracked": len(reassess), "upcoming": reassess.upcoming(limit)}
+
+
+@app.delete("/reassess/{patient_id}")
+def reassess_cancel(patient_id: str):
+    # stop the timer only; the patient stays in the registry
+    return {"cancelled": reassess.cancel(patient_id)}
+
+
+# ------------------ patient registry ------------------
+@app.get("/patients")
+def patients_summary():
+    return registry.summary()
+
+
+@app.get("/patients/{patient_id}")
+def patient_detail(patient_id: str):
+    rec = registry.get(patient_id)
+    if rec is None:
+        raise HTTPException(status_code=404, detail="unknown patient")
+    return rec.to_dict()
+
+
+@app.delete("/patients/{patient_id}")
+def patient_remove(patient_id: str):
+    # patient transported / handed over: drop the record and its timer
+    reassess.cancel(patient_id)
+    return {"removed": registry.remove(patient_id)}
+
+
+@app.get("/reassess/events")
+async def reassess_events():
+    # server-sent events: one "reassessment_due" event per fired timer
+    return StreamingResponse(reassess_hub.stream(), media_type="text/event-stream")
+
+
+# ------------------ rule table ------------------
+@app.get("/rules")
+def get_rules():
+    return {"version": rules.version, "history": rules.history}
+
+
+@app.post("/rules/reload")
+def reload_rules():
+    try:
+        return {"version": rules.reload()}
+    except RuleTableError as e:
+        # previous table keeps serving
+        raise HTTPException(status_code=422, detail=str(e))
+
+
 # ------------------ list recent cases ------------------
 @app.get("/cases")
 def get_cases():
     return RECENT_CASES
 
 
+@app.get("/cases/export")
+def export_cases(format: str = "jsonl.gz", since_id: int = 0):
+    """
+    Stream the whole case log (oldest first, id > since_id) with chunked
+    transfer; rows are read and encoded in batches, never all at once.
+    """
+    from server import export
+
+    rows = db.iter_cases(since_id=since_id)
+    if format == "jsonl.gz":
+        body, media, ext = export.jsonl_gz_chunks(rows), "application/gzip", "jsonl.gz"
+    elif format == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise HTTPException(status_code=501, detail="parquet export needs pyarrow")
+        body, media, ext = export.parquet_chunks(rows), "application/vnd.apache.parquet", "parquet"
+    else:
+        raise HTTPException(status_code=400, detail="format must be jsonl.gz or parquet")
+    return StreamingResponse(body, media_type=media,
+                             headers={"Content-Disposition": f'attachment; filename="cases.{ext}"'})
+
+
 
 # ------------------ helper: confidence scoring (not used yet) ------------------
 def confidence_from_rule(why: str, v) -> float:
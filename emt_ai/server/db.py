@@ -1,31 +1,134 @@
 # server/db.py
-import sqlite3, pathlib, json, time
-DB_PATH = pathlib.Path(__file__).with_name("triage.db")
-
-def _conn():
-    con = sqlite3.connect(DB_PATH)
-    con.execute("""CREATE TABLE IF NOT EXISTS cases(
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        ts REAL,
-        description TEXT,
-        resp_rate REAL,
-        pulse TEXT,
-        cap_refill TEXT,
-        triage_level TEXT,
-        reasoning TEXT
-    )""")
+"""
+SQLite case log.
+
+/triage never waits on the database: log_case() only enqueues the row, and one
+background writer thread owns a long-lived connection and inserts whatever has
+queued up in a single transaction. Lock contention therefore delays the log,
+not the response. The table is created once per database file.
+"""
+import sqlite3, pathlib, json, time, os, queue, threading, atexit, logging
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = pathlib.Path(os.getenv("TRIAGE_DB_PATH") or pathlib.Path(__file__).with_name("triage.db"))
+
+COLUMNS = ("id", "ts", "description", "resp_rate", "pulse", "cap_refill", "triage_level", "reasoning")
+
+_SCHEMA = """CREATE TABLE IF NOT EXISTS cases(
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL,
+    description TEXT,
+    resp_rate REAL,
+    pulse TEXT,
+    cap_refill TEXT,
+    triage_level TEXT,
+    reasoning TEXT
+)"""
+_INSERT = ("INSERT INTO cases(ts,description,resp_rate,pulse,cap_refill,triage_level,reasoning) "
+           "VALUES(?,?,?,?,?,?,?)")
+_schema_done = set()  # database paths whose table is known to exist
+
+
+def _conn(**kw):
+    con = sqlite3.connect(DB_PATH, **kw)
+    if DB_PATH not in _schema_done:
+        con.execute(_SCHEMA)
+        con.commit()
+        _schema_done.add(DB_PATH)
     return con
 
+
+# ------------------ background writer ------------------
+class _Writer:
+    def __init__(self, maxsize: int = 10_000, max_batch: int = 500):
+        self._q: "queue.Queue[tuple]" = queue.Queue(maxsize)
+        self.max_batch = max_batch
+        self._start_lock = threading.Lock()
+        self._thread = None
+
+    def put(self, row: tuple):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="case-log-writer", daemon=True)
+                    self._thread.start()
+        self._q.put_nowait(row)  # queue.Full when the disk has been stuck for a long time
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until every queued row has been written (or dropped). True if drained."""
+        deadline = time.monotonic() + timeout
+        with self._q.all_tasks_done:
+            while self._q.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._q.all_tasks_done.wait(remaining)
+        return True
+
+    def _run(self):
+        con, path = None, None
+        while True:
+            batch = [self._q.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._q.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                if con is None or path != DB_PATH:
+                    if con is not None:
+                        con.close()
+                    path = DB_PATH
+                    con = _conn(check_same_thread=False, timeout=30)
+                with con:  # one transaction per batch
+                    con.executemany(_INSERT, batch)
+            except Exception as e:
+                logger.error("case log: dropped %d row(s) (%s): %s", len(batch), DB_PATH, e)
+                if con is not None:
+                    con.close()
+                con = None
+            finally:
+                for _ in batch:
+                    self._q.task_done()
+
+
+_writer = _Writer()
+atexit.register(_writer.flush, 2.0)
+flush = _writer.flush
+
+
 def log_case(description, resp_rate, pulse, cap_refill, triage_level, reasoning):
-    con = _conn()
-    con.execute("INSERT INTO cases(ts,description,resp_rate,pulse,cap_refill,triage_level,reasoning) VALUES(?,?,?,?,?,?,?)",
-                (time.time(), description, resp_rate, pulse, str(cap_refill), triage_level, reasoning))
-    con.commit(); con.close()
+    # returns at once; raises queue.Full only if the writer is hopelessly behind
+    _writer.put((time.time(), description, resp_rate, pulse,
+                 None if cap_refill is None else str(cap_refill), triage_level, reasoning))
+
 
 def recent_cases(limit=20):
+    flush(1.0)
     con = _conn()
     rows = con.execute("""SELECT ts,description,resp_rate,pulse,cap_refill,triage_level,reasoning
                           FROM cases ORDER BY id DESC LIMIT ?""", (limit,)).fetchall()
     con.close()
     return [dict(ts=r[0], description=r[1], resp_rate=r[2], pulse=r[3],
                  cap_refill=r[4], triage_level=r[5], reasoning=r[6]) for r in rows]
+
+
+def iter_cases(batch=5000, since_id=0):
+    """
+    Yield every case (oldest first) as a dict, fetching `batch` rows at a time
+    so an export never holds the whole log in memory.
+    """
+    flush(1.0)  # include cases logged just before the export started
+    # the generator may be resumed from different threads by a streaming response
+    con = _conn(check_same_thread=False)
+    try:
+        cur = con.execute(f"SELECT {','.join(COLUMNS)} FROM cases WHERE id > ? ORDER BY id", (since_id,))
+        while True:
+            rows = cur.fetchmany(batch)
+            if not rows:
+                break
+            for r in rows:
+                yield dict(zip(COLUMNS, r))
+    finally:
+        con.close()
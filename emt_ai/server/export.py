@@ -0,0 +1,81 @@
+# server/export.py
+"""
+Streaming encoders for the case log: gzip'd JSONL (stdlib only) and Parquet
+(needs pyarrow). Both consume an iterator of case dicts and yield bytes as
+they go, so memory stays bounded by one chunk / row group.
+"""
+from __future__ import annotations
+from typing import Iterable, Iterator, Dict, Any
+import json, zlib
+
+CHUNK_BYTES = 64 * 1024
+
+
+def jsonl_gz_chunks(rows: Iterable[Dict[str, Any]], chunk_bytes: int = CHUNK_BYTES) -> Iterator[bytes]:
+    z = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    buf, size = [], 0
+    for row in rows:
+        line = (json.dumps(row, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        buf.append(line)
+        size += len(line)
+        if size >= chunk_bytes:
+            out = z.compress(b"".join(buf))
+            buf, size = [], 0
+            if out:
+                yield out
+    tail = z.compress(b"".join(buf)) + z.flush()
+    if tail:
+        yield tail
+
+
+class _Drain:
+    """Write-only file object whose contents are handed out and dropped."""
+    closed = False
+
+    def __init__(self):
+        self._parts = []
+        self._pos = 0
+
+    def write(self, b) -> int:
+        b = bytes(b)
+        self._parts.append(b)
+        self._pos += len(b)
+        return len(b)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self) -> bytes:
+        out = b"".join(self._parts)
+        self._parts = []
+        return out
+
+
+def parquet_chunks(rows: Iterable[Dict[str, Any]], row_group: int = 50_000) -> Iterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("id", pa.int64()), ("ts", pa.float64()), ("description", pa.string()),
+        ("resp_rate", pa.float64()), ("pulse", pa.string()), ("cap_refill", pa.string()),
+        ("triage_level", pa.string()), ("reasoning", pa.string()),
+    ])
+    sink = _Drain()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= row_group:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            batch = []
+            yield sink.take()
+    if batch:
+        writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+    writer.close()
+    yield sink.take()
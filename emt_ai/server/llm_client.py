@@ -1,6 +1,9 @@
 from __future__ import annotations
-from typing import Optional, Dict, Any
-import requests, logging, re
+from typing import Optional, Dict, Any, Union
+import requests, logging, re, os, time, json
+
+from server.prompts import load_template
+from safety import DEFAULT_FILTER
 
 logger = logging.getLogger(__name__)
 
@@ -43,17 +46,27 @@ def _clean_reason_text(raw: str) -> str:
     return text
 
 
-class LLMClient:
-    SYS_PROMPT = (
-        "You are an emergency triage assistant. Follow START and WHO Basic Emergency Care scope. "
-        "NO medications. NO invasive procedures. Keep to layperson first-aid reasoning. "
-        "Return only ONE short explanatory sentence. "
-    )
+# Generation stops at any of these markers (the model drifting into a new example).
+_STOP = ["\n\n", "Label:", "Description:", "Vitals:", "Reason:", "Examples:"]
+
+# Canned case for the startup warm-up generation (primes weights + prefix cache).
+WARMUP_CASE = ("Minor", "Walking with small cuts", {"resp_rate": 18, "pulse": "strong", "cap_refill": "<2"})
+
 
-    def __init__(self, base_url: str = "http://127.0.0.1:11434", model: str = "llama3.2:latest", timeout: int = 12):
+class LLMClient:
+    def __init__(
+        self,
+        base_url: str = "http://127.0.0.1:11434",
+        model: str = "llama3.2:latest",
+        timeout: int = 12,
+        prompt_version: Optional[str] = None,  # default: $TRIAGE_PROMPT_VERSION or v1
+        keep_alive: Union[int, str] = -1,  # -1 pins the model in Ollama's memory
+    ):
         self.base_url = base_url.rstrip("/")
         self.model = model
         self.timeout = timeout
+        self.keep_alive = keep_alive
+        self.template = load_template(prompt_version or os.getenv("TRIAGE_PROMPT_VERSION", "v1"))  # validated once
 
     def is_alive(self) -> bool:
         try:
@@ -62,56 +75,91 @@ class LLMClient:
         except Exception:
             return False
 
-    def safe_reason(self, label: str, description: str, vitals: Dict[str, Any]) -> Optional[str]:
+    def reason(self, label: str, description: str, vitals: Dict[str, Any],
+               timeout: Optional[float] = None) -> str:
+        """
+        One generation against this instance. Raises on any transport or HTTP
+        error so callers that route between instances can see failures.
+
+        Output is streamed through the safety filter; on a medication, dosage
+        or invasive-procedure hit the generation is abandoned and "" returned.
+        """
+        # The prompt goes through the model's chat template (instruct models
+        # answer poorly without it). The template header plus our static prefix
+        # are identical on every call, so the runner still reuses their cached
+        # KV state; keep_alive keeps that cache (and the weights) resident.
+        prompt = self.template.render(label, description, vitals)
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": True,
+            "keep_alive": self.keep_alive,
+            "options": {
+                "temperature": 0.2,
+                "top_p": 0.9,
+                "repeat_penalty": 1.05,
+                "num_predict": 64,
+                "stop": _STOP,
+            },
+        }
+        timeout = self.timeout if timeout is None else min(timeout, self.timeout)
+        deadline = time.monotonic() + timeout
+        scanner = DEFAULT_FILTER.scanner()
+        parts = []
+        with requests.post(f"{self.base_url}/api/generate", json=payload, timeout=timeout, stream=True) as r:
+            r.raise_for_status()
+            for line in r.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                token = chunk.get("response") or ""
+                parts.append(token)
+                if scanner.feed(token) is not None:
+                    break  # closing the response stops the generation in Ollama
+                if chunk.get("done"):
+                    break
+                if time.monotonic() > deadline:
+                    raise requests.Timeout(f"generation exceeded {timeout:.2f}s")
+        hit = scanner.close()
+        if hit is not None:
+            logger.warning("LLM output blocked by safety filter (%s: %r)", hit.category, hit.term)
+            return ""
+        return _clean_reason_text("".join(parts).strip())
+
+    def safe_reason(self, label: str, description: str, vitals: Dict[str, Any],
+                    timeout: Optional[float] = None) -> Optional[str]:
         """
         Ask the local LLM for ONE concise sentence (≤22 words) explaining the chosen label.
-        Returns None if Ollama is unavailable or any error occurs.
+        Returns None if Ollama is unavailable or any error occurs. `timeout`
+        (seconds) can only shorten the client's own timeout.
         """
         if not self.is_alive():
             return None
-
-        prompt = f"""
-You are an emergency triage assistant. Use START triage and WHO Basic Emergency Care scope.
-Answer with ONE short, plain-English sentence (≤22 words) that explains WHY the chosen triage label fits.
-Do NOT output JSON, lists, bullets, or labels. Do NOT start with "Reason:".
-No meds, no invasive procedures, no speculation.
-
-Style:
-- Start with the clinical signal, then the implication.
-- Prefer numbers where available (e.g., "RR 34/min (>30)").
-- Do not mention “rules” or “START”, just the clinical logic.
-
-Examples (format you must imitate — one sentence only):
-Immediate → RR 34/min (>30) indicates respiratory compromise; prioritize immediate care.
-Expectant → Apnea with no pulse indicates non-survivable status; allocate resources to salvageable patients.
-Minor → Ambulatory with stable vitals suggests minor injuries suitable for delayed treatment.
-Delayed → Stable vitals and following commands indicate delayed priority.
-
-Now write exactly one sentence:
-
-Label: {label}
-Description: {description}
-Vitals: {vitals}
-""".strip()
-
         try:
-            payload = {
-                "model": self.model,
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "temperature": 0.2,
-                    "top_p": 0.9,
-                    "repeat_penalty": 1.05,
-                    "num_predict": 64,
-                    "stop": ["\n\n", "Label:", "Description:", "Vitals:", "Reason:", "Examples:"],
-                },
-            }
-            r = requests.post(f"{self.base_url}/api/generate", json=payload, timeout=self.timeout)
-            r.raise_for_status()
-            raw = (r.json().get("response") or "").strip()
-            cleaned = _clean_reason_text(raw)
-            return cleaned or None
+            return self.reason(label, description, vitals, timeout) or None
         except Exception as e:
             logger.warning("LLMClient.safe_reason failed: %s", e)
             return None
+
+    def warm_up(self) -> bool:
+        """
+        Load and pin the model in Ollama, then run one generation so the first
+        real patient does not pay for the cold load. Returns True if warm.
+        """
+        if not self.is_alive():
+            return False
+        t0 = time.perf_counter()
+        try:
+            # an empty prompt just loads the model
+            r = requests.post(
+                f"{self.base_url}/api/generate",
+                json={"model": self.model, "prompt": "", "keep_alive": self.keep_alive},
+                timeout=max(self.timeout, 120),
+            )
+            r.raise_for_status()
+        except Exception as e:
+            logger.warning("LLMClient.warm_up preload failed: %s", e)
+            return False
+        ok = self.safe_reason(*WARMUP_CASE) is not None
+        logger.info("LLMClient.warm_up %s in %.1fs", "done" if ok else "failed", time.perf_counter() - t0)
+        return ok
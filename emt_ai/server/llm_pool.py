@@ -0,0 +1,174 @@
+# server/llm_pool.py
+"""
+Pool of Ollama instances behind the LLMClient interface.
+
+Each generation goes to the admitted instance with the fewest outstanding
+requests (ties broken by recent latency). An instance that fails
+`max_failures` times in a row is ejected for `eject_s` seconds, then probed
+with is_alive() and re-admitted if it answers.
+"""
+from __future__ import annotations
+from typing import Optional, Dict, Any, List, Sequence
+import threading, time, logging
+
+logger = logging.getLogger(__name__)
+
+
+class _Backend:
+    __slots__ = ("client", "outstanding", "failures", "ejected_until",
+                 "latency_ms", "requests", "errors", "last_error")
+
+    def __init__(self, client):
+        self.client = client
+        self.outstanding = 0
+        self.failures = 0          # consecutive
+        self.ejected_until = 0.0   # monotonic; 0 = admitted
+        self.latency_ms: Optional[float] = None  # EWMA of successful calls
+        self.requests = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+
+
+class LLMPool:
+    def __init__(self, clients: Sequence, max_failures: int = 3, eject_s: float = 30.0,
+                 ewma_alpha: float = 0.2, max_attempts: int = 2):
+        if not clients:
+            raise ValueError("LLMPool needs at least one client")
+        self._backends = [_Backend(c) for c in clients]
+        self.max_failures = max_failures
+        self.eject_s = eject_s
+        self.ewma_alpha = ewma_alpha
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_urls(cls, urls: Sequence[str], **client_kwargs) -> "LLMPool":
+        from server.llm_client import LLMClient
+
+        return cls([LLMClient(base_url=u, **client_kwargs) for u in urls])
+
+    # ------------------ routing ------------------
+    def _readmit_due(self):
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            for b in self._backends:
+                if b.ejected_until and b.ejected_until <= now:
+                    # claim the probe so concurrent callers don't all probe it
+                    b.ejected_until = now + self.eject_s
+                    due.append(b)
+        for b in due:
+            alive = b.client.is_alive()
+            with self._lock:
+                if alive:
+                    b.ejected_until = 0.0
+                    b.failures = 0
+                    logger.info("LLMPool re-admitted %s", getattr(b.client, "base_url", b.client))
+
+    def _acquire(self, exclude: List[_Backend]) -> Optional[_Backend]:
+        with self._lock:
+            best = None
+            for b in self._backends:
+                if b.ejected_until or b in exclude:
+                    continue
+                key = (b.outstanding, b.latency_ms if b.latency_ms is not None else 0.0)
+                if best is None or key < best[0]:
+                    best = (key, b)
+            if best is None:
+                return None
+            b = best[1]
+            b.outstanding += 1
+            b.requests += 1
+            return b
+
+    def _release(self, b: _Backend, started: float, error: Optional[Exception], budget_cut: bool = False):
+        with self._lock:
+            b.outstanding -= 1
+            if budget_cut:
+                # the caller's deadline ran out, not the instance's fault
+                return
+            if error is None:
+                ms = (time.perf_counter() - started) * 1000.0
+                a = self.ewma_alpha
+                b.latency_ms = ms if b.latency_ms is None else (1 - a) * b.latency_ms + a * ms
+                b.failures = 0
+                return
+            b.errors += 1
+            b.failures += 1
+            b.last_error = str(error)[:200]
+            if b.failures >= self.max_failures and not b.ejected_until:
+                b.ejected_until = time.monotonic() + self.eject_s
+                logger.warning("LLMPool ejected %s after %d failures: %s",
+                               getattr(b.client, "base_url", b.client), b.failures, b.last_error)
+
+    # ------------------ LLMClient interface ------------------
+    def is_alive(self) -> bool:
+        with self._lock:
+            admitted = [b for b in self._backends if not b.ejected_until]
+        return any(b.client.is_alive() for b in admitted)
+
+    def safe_reason(self, label: str, description: str, vitals: Dict[str, Any],
+                    timeout: Optional[float] = None) -> Optional[str]:
+        """
+        Same contract as LLMClient.safe_reason. A failed call is retried once
+        on a different instance; returns None if no instance produced text.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self._readmit_due()
+        tried: List[_Backend] = []
+        for _ in range(self.max_attempts):
+            b = self._acquire(tried)
+            if b is None:
+                break
+            tried.append(b)
+            left = None if deadline is None else deadline - time.monotonic()
+            if left is not None and left <= 0:
+                with self._lock:
+                    b.outstanding -= 1
+                break
+            started = time.perf_counter()
+            try:
+                text = b.client.reason(label, description, vitals, left)
+            except Exception as e:
+                cut = left is not None and time.perf_counter() - started >= left * 0.95
+                self._release(b, started, e, budget_cut=cut)
+                if cut:
+                    break
+                continue
+            self._release(b, started, None)
+            return text or None
+        return None
+
+    def warm_up(self) -> bool:
+        # warm every instance in parallel; the pool is warm if any one is
+        results: List[bool] = [False] * len(self._backends)
+
+        def run(i, b):
+            try:
+                results[i] = bool(b.client.warm_up())
+            except Exception as e:
+                logger.warning("LLMPool warm-up failed for %s: %s", getattr(b.client, "base_url", i), e)
+
+        threads = [threading.Thread(target=run, args=(i, b), daemon=True) for i, b in enumerate(self._backends)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return any(results)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "backend": getattr(b.client, "base_url", str(i)),
+                    "healthy": not b.ejected_until,
+                    "ejected_for_s": round(max(0.0, b.ejected_until - now), 1) if b.ejected_until else 0.0,
+                    "outstanding": b.outstanding,
+                    "requests": b.requests,
+                    "errors": b.errors,
+                    "latency_ms": round(b.latency_ms, 1) if b.latency_ms is not None else None,
+                    "last_error": b.last_error,
+                }
+                for i, b in enumerate(self._backends)
+            ]
@@ -0,0 +1,217 @@
+# server/local_llm.py
+"""
+In-process transformers backend, drop-in for LLMClient.
+
+The model is loaded once on CPU (at warm-up, or lazily on first use). Concurrent safe_reason() calls are collected
+for a short window and run as one left-padded generate() call, and the shared
+instruction prefix is evaluated once at load time so each batch only pays for
+the per-case suffix tokens.
+"""
+from __future__ import annotations
+from concurrent.futures import Future
+from typing import Optional, Dict, Any, List, Tuple
+import copy, os, queue, threading, time, logging
+
+from server.llm_client import _STOP, WARMUP_CASE, _clean_reason_text
+from server.prompts import load_template
+from safety import DEFAULT_FILTER
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOCAL_MODEL = "TinyLlama/TinyLlama-1.1B-Chat-v1.0"
+
+
+def _cut_at_stop(text: str) -> str:
+    for s in _STOP:
+        i = text.find(s)
+        if i != -1:
+            text = text[:i]
+    return text
+
+
+class LocalLLMClient:
+    def __init__(
+        self,
+        model: str = DEFAULT_LOCAL_MODEL,
+        max_batch: int = 8,
+        batch_window_ms: int = 15,
+        max_new_tokens: int = 48,
+        timeout: int = 12,
+        prompt_version: Optional[str] = None,  # default: $TRIAGE_PROMPT_VERSION or v1
+    ):
+        self.model = model
+        self.max_batch = max_batch
+        self.batch_window = batch_window_ms / 1000.0
+        self.max_new_tokens = max_new_tokens
+        self.timeout = timeout
+        self.template = load_template(prompt_version or os.getenv("TRIAGE_PROMPT_VERSION", "v1"))
+        self._chat_tail = ""
+
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._load_lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self._load_error: Optional[Exception] = None
+
+    # ------------------ loading ------------------
+    def _ensure_loaded(self, retry: bool = False):
+        # loading is deferred to warm_up() (or the first request) so that
+        # importing the app stays cheap and /health answers immediately.
+        # A failed load is remembered: requests fail fast on it, and only
+        # warm_up() (retry=True) tries again.
+        if self._worker is not None:
+            return
+        with self._load_lock:
+            if self._worker is None:
+                if self._load_error is not None and not retry:
+                    raise self._load_error
+                try:
+                    self._load()
+                except Exception as e:
+                    self._load_error = e
+                    raise
+                self._load_error = None
+                worker = threading.Thread(target=self._run, name="local-llm-batcher", daemon=True)
+                worker.start()
+                self._worker = worker
+
+    def _load(self):
+        # heavy imports stay here so the Ollama path never pays for them
+        import torch
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+
+        threads = os.getenv("TRIAGE_LOCAL_THREADS")
+        if threads:
+            torch.set_num_threads(int(threads))
+
+        t0 = time.perf_counter()
+        # local_files_only: never reach for the network in the field
+        self._tok = AutoTokenizer.from_pretrained(self.model, local_files_only=True)
+        self._tok.padding_side = "left"
+        if self._tok.pad_token is None:
+            self._tok.pad_token = self._tok.eos_token
+        self._model = AutoModelForCausalLM.from_pretrained(
+            self.model, local_files_only=True, torch_dtype=torch.float32
+        )
+        self._model.eval()
+
+        # Evaluate the template's static prefix once; every batch reuses its KV cache.
+        head, self._chat_tail = self._chat_wrap()
+        self._prefix_ids = self._tok(head + self.template.prefix, return_tensors="pt",
+                                     add_special_tokens=not head).input_ids
+        with torch.inference_mode():
+            out = self._model(input_ids=self._prefix_ids, use_cache=True)
+        self._prefix_cache = out.past_key_values
+
+        logger.info("LocalLLMClient loaded %s (%d prefix tokens) in %.1fs",
+                    self.model, self._prefix_ids.shape[1], time.perf_counter() - t0)
+
+    def _chat_wrap(self) -> Tuple[str, str]:
+        """
+        Text the model's chat template puts before and after a user message,
+        ending with the assistant cue. ("", "") for models without a template.
+        """
+        if not getattr(self._tok, "chat_template", None):
+            return "", ""
+        marker = "\x00CASE\x00"
+        text = self._tok.apply_chat_template(
+            [{"role": "user", "content": marker}], tokenize=False, add_generation_prompt=True
+        )
+        head, _, tail = text.partition(marker)
+        return head, tail
+
+    def _expand_prefix_cache(self, batch: int):
+        # generate() appends to the cache in place, so every batch gets its own copy
+        cache = copy.deepcopy(self._prefix_cache)
+        cache.batch_repeat_interleave(batch)
+        return cache
+
+    # ------------------ batching ------------------
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            # callers that already gave up are dropped before generation
+            batch = [(s, f) for s, f in batch if f.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                texts = self._generate([s for s, _ in batch])
+            except Exception as e:
+                for _, f in batch:
+                    f.set_exception(e)
+            else:
+                for (_, f), t in zip(batch, texts):
+                    f.set_result(t)
+
+    def _generate(self, suffixes: List[str]) -> List[str]:
+        import torch
+
+        b = len(suffixes)
+        enc = self._tok([s + self._chat_tail for s in suffixes], return_tensors="pt",
+                        padding=True, add_special_tokens=False)
+        p = self._prefix_ids.shape[1]
+        input_ids = torch.cat([self._prefix_ids.expand(b, -1), enc.input_ids], dim=1)
+        # padding sits between prefix and suffix; the mask hides it and
+        # position ids are derived from the mask
+        attention_mask = torch.cat(
+            [torch.ones(b, p, dtype=enc.attention_mask.dtype), enc.attention_mask], dim=1
+        )
+        with torch.inference_mode():
+            out = self._model.generate(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                past_key_values=self._expand_prefix_cache(b),
+                max_new_tokens=self.max_new_tokens,
+                do_sample=False,
+                repetition_penalty=1.05,
+                pad_token_id=self._tok.pad_token_id,
+            )
+        new_tokens = out[:, input_ids.shape[1]:]
+        texts = [_cut_at_stop(t) for t in self._tok.batch_decode(new_tokens, skip_special_tokens=True)]
+        # unsafe outputs are blanked so callers fall back to the rule reason
+        for i, hit in enumerate(DEFAULT_FILTER.check_batch(texts)):
+            if hit is not None:
+                logger.warning("local LLM output blocked by safety filter (%s: %r)", hit.category, hit.term)
+                texts[i] = ""
+        return texts
+
+    # ------------------ LLMClient interface ------------------
+    def is_alive(self) -> bool:
+        return self._worker is not None and self._worker.is_alive()
+
+    def warm_up(self) -> bool:
+        try:
+            self._ensure_loaded(retry=True)
+        except Exception as e:
+            logger.warning("LocalLLMClient.warm_up load failed: %s", e)
+            return False
+        return self.safe_reason(*WARMUP_CASE) is not None
+
+    def safe_reason(self, label: str, description: str, vitals: Dict[str, Any],
+                    timeout: Optional[float] = None) -> Optional[str]:
+        """
+        Same contract as LLMClient.safe_reason: one cleaned sentence, or None on any error.
+        """
+        try:
+            self._ensure_loaded()
+        except Exception as e:
+            logger.debug("LocalLLMClient not loaded: %s", e)
+            return None
+        fut: Future = Future()
+        self._queue.put((self.template.render_suffix(label, description, vitals), fut))
+        try:
+            raw = fut.result(timeout=self.timeout if timeout is None else min(timeout, self.timeout))
+            return _clean_reason_text(raw.strip()) or None
+        except Exception as e:
+            fut.cancel()
+            logger.warning("LocalLLMClient.safe_reason failed: %s", e)
+            return None
@@ -0,0 +1,60 @@
+# server/prompts.py
+"""
+Versioned prompt templates (model/prompts/triage_prompt_<version>.txt).
+
+A template is a static prefix (instructions + few-shot examples) and a per-case
+suffix, separated by a line starting with CASE_MARKER. The prefix is sent
+byte-for-byte identical on every call so backends can reuse its cached
+evaluation; only the suffix is formatted per request.
+"""
+from __future__ import annotations
+from string import Formatter
+from typing import Dict, Any
+import pathlib
+
+PROMPT_DIR = pathlib.Path(__file__).resolve().parents[1] / "model" / "prompts"
+CASE_MARKER = "### CASE"
+REQUIRED_FIELDS = {"label", "description", "vitals"}
+
+
+class PromptTemplate:
+    def __init__(self, version: str, prefix: str, suffix: str):
+        self.version = version
+        self.prefix = prefix
+        self.suffix = suffix
+        self._format = suffix.format  # bound once; str.format is the whole per-case cost
+
+    def render_suffix(self, label: str, description: str, vitals: Dict[str, Any]) -> str:
+        return self._format(label=label, description=description, vitals=vitals)
+
+    def render(self, label: str, description: str, vitals: Dict[str, Any]) -> str:
+        return self.prefix + self.render_suffix(label, description, vitals)
+
+
+def parse_template(version: str, text: str) -> PromptTemplate:
+    """
+    Split and validate a template. Raises ValueError on a malformed file so a
+    bad prompt fails at startup rather than on the first patient.
+    """
+    head, sep, tail = text.partition("\n" + CASE_MARKER)
+    if not sep:
+        raise ValueError(f"prompt {version}: missing '{CASE_MARKER}' separator line")
+    prefix = head.rstrip("\n") + "\n\n"
+    suffix = tail.split("\n", 1)[1].strip() if "\n" in tail else ""
+
+    if not head.strip():
+        raise ValueError(f"prompt {version}: empty prefix")
+    fields = {name for _, name, _, _ in Formatter().parse(suffix) if name is not None}
+    if fields != REQUIRED_FIELDS:
+        raise ValueError(
+            f"prompt {version}: suffix fields {sorted(fields)} != {sorted(REQUIRED_FIELDS)}"
+        )
+    leaked = [f for f in REQUIRED_FIELDS if "{" + f + "}" in prefix]
+    if leaked:
+        raise ValueError(f"prompt {version}: placeholders {leaked} in static prefix")
+    return PromptTemplate(version, prefix, suffix)
+
+
+def load_template(version: str = "v1") -> PromptTemplate:
+    path = PROMPT_DIR / f"triage_prompt_{version}.txt"
+    return parse_template(version, path.read_text(encoding="utf-8"))
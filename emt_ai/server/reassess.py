@@ -0,0 +1,142 @@
+# server/reassess.py
+"""
+Reassessment timers for tracked patients.
+
+A binary heap of (due, seq, patient_id) with lazy deletion: rescheduling or
+cancelling just replaces the patient's entry in a dict and leaves the old heap
+entry to be skipped when it surfaces. schedule/pop are O(log n), cancel is
+O(1), and the heap is rebuilt when stale entries outnumber live ones.
+Fired timers repeat at the same interval until the patient is re-triaged
+or removed.
+"""
+from __future__ import annotations
+from typing import Dict, List, Optional, Tuple, Any
+import asyncio, heapq, itertools, json, logging, threading, time
+
+logger = logging.getLogger(__name__)
+
+# seconds between reassessments, from the ACTIONS guidance in app.py
+REASSESS_S = {
+    "Immediate": 120,    # "Reassess every 2–3 minutes"
+    "Delayed": 600,      # "Reassess every 10–15 minutes"
+    "Expectant": 900,    # "Reassess periodically if safe"
+    "Minor": 1800,       # "recheck if worse"
+}
+
+
+class ReassessScheduler:
+    def __init__(self, intervals: Dict[str, float] = REASSESS_S):
+        self.intervals = dict(intervals)
+        self._heap: List[Tuple[float, int, str]] = []
+        self._live: Dict[str, Tuple[float, int, str]] = {}  # patient_id -> (due, seq, level)
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def schedule(self, patient_id: str, level: str, now: Optional[float] = None) -> float:
+        """(Re)start the patient's timer for `level`; returns the due time."""
+        now = time.time() if now is None else now
+        due = now + self.intervals[level]
+        with self._lock:
+            seq = next(self._seq)
+            self._live[patient_id] = (due, seq, level)
+            heapq.heappush(self._heap, (due, seq, patient_id))
+            self._maybe_compact()
+        return due
+
+    def cancel(self, patient_id: str) -> bool:
+        with self._lock:
+            return self._live.pop(patient_id, None) is not None
+
+    def _is_live(self, entry: Tuple[float, int, str]) -> bool:
+        cur = self._live.get(entry[2])
+        return cur is not None and cur[1] == entry[1]
+
+    def _maybe_compact(self):
+        if len(self._heap) > 64 and len(self._heap) > 2 * len(self._live):
+            self._heap = [(due, seq, pid) for pid, (due, seq, _) in self._live.items()]
+            heapq.heapify(self._heap)
+
+    def next_due(self) -> Optional[float]:
+        with self._lock:
+            while self._heap and not self._is_live(self._heap[0]):
+                heapq.heappop(self._heap)
+            return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: Optional[float] = None, limit: int = 1000) -> List[Dict[str, Any]]:
+        """
+        Fire every timer due at `now` (at most `limit`) and re-arm each one for
+        its next interval. Returns one event dict per fired timer.
+        """
+        now = time.time() if now is None else now
+        events = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now and len(events) < limit:
+                entry = heapq.heappop(self._heap)
+                if not self._is_live(entry):
+                    continue
+                due, _, pid = entry
+                level = self._live[pid][2]
+                events.append({"type": "reassessment_due", "patient_id": pid,
+                               "triage_level": level, "due": due})
+                seq = next(self._seq)
+                nxt = now + self.intervals[level]
+                self._live[pid] = (nxt, seq, level)
+                heapq.heappush(self._heap, (nxt, seq, pid))
+        return events
+
+    def upcoming(self, n: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = heapq.nsmallest(n, self._live.items(), key=lambda kv: kv[1][0])
+        return [{"patient_id": pid, "triage_level": lvl, "due": due} for pid, (due, _, lvl) in items]
+
+
+# ------------------ push to clients ------------------
+class EventHub:
+    """Fan-out of scheduler events to server-sent-event subscribers."""
+
+    def __init__(self, maxsize: int = 1000):
+        self.maxsize = maxsize
+        self._subs: List[asyncio.Queue] = []
+
+    def subscribe(self) -> asyncio.Queue:
+        q: asyncio.Queue = asyncio.Queue(self.maxsize)
+        self._subs.append(q)
+        return q
+
+    def unsubscribe(self, q: asyncio.Queue):
+        if q in self._subs:
+            self._subs.remove(q)
+
+    def publish(self, event: Dict[str, Any]):
+        for q in self._subs:
+            if not q.full():  # a stalled client misses events rather than blocking the rest
+                q.put_nowait(event)
+
+    async def stream(self):
+        q = self.subscribe()
+        try:
+            while True:
+                event = await q.get()
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            self.unsubscribe(q)
+
+
+async def run_timer_loop(scheduler: ReassessScheduler, hub: EventHub, max_sleep: float = 0.5):
+    # polling is capped at max_sleep so a newly scheduled, earlier timer is
+    # never late by more than that. One bad tick is logged and the loop goes
+    # on: timers must keep firing for the rest of the incident.
+    while True:
+        delay = max_sleep
+        try:
+            for event in scheduler.pop_due():
+                hub.publish(event)
+            nxt = scheduler.next_due()
+            if nxt is not None:
+                delay = min(max_sleep, max(0.0, nxt - time.time()))
+        except Exception:
+            logger.exception("reassessment timer tick failed")
+        await asyncio.sleep(delay)
@@ -0,0 +1,167 @@
+# server/registry.py
+"""
+In-memory patient registry keyed by triage tag id.
+
+Records use __slots__ and keep vitals history in one fixed-size float32 ring
+(time offset, RR, cap refill, pulse code per sample) instead of dict copies
+of every request, so a tracked patient costs a few hundred bytes. Each record
+stores a hash of the inputs that decide triage; re-triage with the same hash
+reuses the stored result instead of re-running the rules, and re-runs only
+the LLM when the stored reasoning is the rule fallback.
+"""
+from __future__ import annotations
+from array import array
+from typing import Dict, Any, FrozenSet, List, Optional, Tuple
+import math, threading, time
+
+from rule_engine import parse_cap_refill
+
+HISTORY = 8        # vitals samples kept per patient
+_FIELDS = 4        # t_offset, resp_rate, cap_refill, pulse_code
+_NAN = float("nan")
+
+LEVELS = ("Expectant", "Immediate", "Delayed", "Minor")
+PULSE_CODES = {"": 0, "none": 1, "absent": 1, "weak": 2, "normal": 3, "strong": 4, "fast": 5}
+_PULSE_NAMES = {0: None, 1: "none", 2: "weak", 3: "normal", 4: "strong", 5: "fast", 6: "other"}
+
+
+def _cap_value(x) -> float:
+    # ">2" / "<2" keep their direction as +/-0.01 (same convention as the rules)
+    v = parse_cap_refill(x)
+    return _NAN if v is None else v
+
+
+def input_key(description, resp_rate, pulse, cap_refill, rules_version) -> int:
+    """Hash of everything the triage decision depends on."""
+    return hash((
+        " ".join((description or "").lower().split()),
+        resp_rate,
+        (pulse or "").strip().lower(),
+        None if cap_refill is None else str(cap_refill).strip().lower(),
+        rules_version,
+    ))
+
+
+class PatientRecord:
+    __slots__ = ("patient_id", "level", "reason", "reasoning", "llm_reasoning", "signals", "confidence",
+                 "input_key", "first_seen", "last_seen", "triage_count", "_ring", "_head", "_n", "transitions")
+
+    def __init__(self, patient_id: str, now: float):
+        self.patient_id = patient_id
+        self.level: Optional[str] = None
+        self.reason = ""
+        self.reasoning = ""
+        self.llm_reasoning = False   # reasoning came from the LLM, not the rule fallback
+        self.signals: FrozenSet[str] = frozenset()  # learned signals behind the decision
+        self.confidence = 0.0
+        self.input_key = 0
+        self.first_seen = now
+        self.last_seen = now
+        self.triage_count = 0
+        self._ring = array("f", [_NAN]) * (HISTORY * _FIELDS)
+        self._head = 0
+        self._n = 0
+        self.transitions: Optional[List[Tuple[float, str, str]]] = None  # created on first change
+
+    def push_vitals(self, now: float, resp_rate, pulse, cap_refill):
+        i = self._head * _FIELDS
+        r = self._ring
+        r[i] = now - self.first_seen
+        r[i + 1] = _NAN if resp_rate is None else resp_rate
+        r[i + 2] = _cap_value(cap_refill)
+        r[i + 3] = PULSE_CODES.get((pulse or "").strip().lower(), 6)
+        self._head = (self._head + 1) % HISTORY
+        self._n = min(self._n + 1, HISTORY)
+
+    def vitals_history(self) -> List[Dict[str, Any]]:
+        """Oldest first."""
+        out = []
+        start = (self._head - self._n) % HISTORY
+        for k in range(self._n):
+            i = ((start + k) % HISTORY) * _FIELDS
+            t, rr, cr, pc = self._ring[i:i + _FIELDS]
+            out.append({
+                "ts": self.first_seen + t,
+                "resp_rate": None if math.isnan(rr) else rr,
+                "cap_refill": None if math.isnan(cr) else round(cr, 2),
+                "pulse": _PULSE_NAMES.get(int(pc)),
+            })
+        return out
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "patient_id": self.patient_id,
+            "triage_level": self.level,
+            "reasoning": self.reasoning,
+            "confidence": self.confidence,
+            "first_seen": self.first_seen,
+            "last_seen": self.last_seen,
+            "triage_count": self.triage_count,
+            "vitals": self.vitals_history(),
+            "transitions": [{"ts": t, "from": a, "to": b} for t, a, b in (self.transitions or [])],
+        }
+
+
+class PatientRegistry:
+    def __init__(self):
+        self._patients: Dict[str, PatientRecord] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._patients)
+
+    def get(self, patient_id: str) -> Optional[PatientRecord]:
+        return self._patients.get(patient_id)
+
+    def unchanged(self, patient_id: str, key: int) -> Optional[PatientRecord]:
+        """The record if its last triage used exactly these inputs, else None."""
+        rec = self._patients.get(patient_id)
+        return rec if rec is not None and rec.level is not None and rec.input_key == key else None
+
+    def touch(self, rec: PatientRecord, now: Optional[float] = None):
+        # re-triage with unchanged inputs: only the timestamps move
+        with self._lock:
+            rec.last_seen = time.time() if now is None else now
+            rec.triage_count += 1
+
+    def set_reasoning(self, rec: PatientRecord, reasoning: str):
+        # LLM sentence obtained later for an unchanged triage
+        with self._lock:
+            rec.reasoning = reasoning
+            rec.llm_reasoning = True
+
+    def update(self, patient_id: str, key: int, level: str, reason: str, reasoning: str,
+               confidence: float, resp_rate=None, pulse=None, cap_refill=None,
+               now: Optional[float] = None, llm_reasoning: bool = False,
+               signals: FrozenSet[str] = frozenset()) -> PatientRecord:
+        now = time.time() if now is None else now
+        with self._lock:
+            rec = self._patients.get(patient_id)
+            if rec is None:
+                rec = self._patients[patient_id] = PatientRecord(patient_id, now)
+            if rec.level is not None and rec.level != level:
+                if rec.transitions is None:
+                    rec.transitions = []
+                rec.transitions.append((now, rec.level, level))
+            rec.level = level
+            rec.reason = reason
+            rec.reasoning = reasoning
+            rec.llm_reasoning = llm_reasoning
+            rec.signals = frozenset(signals)
+            rec.confidence = confidence
+            rec.input_key = key
+            rec.last_seen = now
+            rec.triage_count += 1
+            rec.push_vitals(now, resp_rate, pulse, cap_refill)
+        return rec
+
+    def remove(self, patient_id: str) -> bool:
+        with self._lock:
+            return self._patients.pop(patient_id, None) is not None
+
+    def summary(self) -> Dict[str, Any]:
+        counts = dict.fromkeys(LEVELS, 0)
+        with self._lock:
+            for rec in self._patients.values():
+                counts[rec.level] = counts.get(rec.level, 0) + 1
+        return {"tracked": len(self._patients), "by_level": counts}
@@ -0,0 +1,113 @@
+# text_signals.py
+"""
+Learned free-text signal tier between the START rules and the LLM.
+
+Descriptions are hashed into word unigram + bigram and within-word character
+trigram features and scored by one
+linear layer per signal (a NumPy weight matrix), so a prediction is a gather
+and a sum: microseconds per description, and predict_batch() scores many at
+once. Signal names match keyword groups in model/rules/start_rules.json, so a
+confident prediction can be handed to the rule engine as an extra signal.
+The trigrams are what let it generalise past the keyword lists (which match
+substrings already) to misspellings and variants: "unconcious",
+"nonresponsive", "won't follow commands".
+
+Weights are trained offline by scripts/train_text_signals.py.
+"""
+from __future__ import annotations
+from typing import Dict, List, Optional, Sequence, Tuple
+import pathlib, re, zlib, logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MODEL_PATH = pathlib.Path(__file__).resolve().parent / "model" / "signals" / "text_signals_v2.npz"
+# no "bleeding": the case files hold a single uncontrolled-bleeding example,
+# too few to learn from
+SIGNALS = ("mental", "ambulatory", "apnea")
+DIM = 1 << 16  # hashed feature space; must be a power of two
+
+_TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+
+def featurize(text: str, dim: int = DIM) -> List[int]:
+    """
+    Hashed word unigrams + bigrams, plus character trigrams of each word of 4+
+    letters ("#"-prefixed so they never collide with a word of the same
+    spelling). Duplicates are kept: counts act as weights.
+    """
+    toks = _TOKEN_RE.findall((text or "").lower())
+    mask = dim - 1
+    feats = [zlib.crc32(t.encode()) & mask for t in toks]
+    feats += [zlib.crc32(f"{a} {b}".encode()) & mask for a, b in zip(toks, toks[1:])]
+    for t in toks:
+        if len(t) >= 4 and not t.isdigit():
+            w = f"<{t}>"
+            feats += [zlib.crc32(f"#{w[i:i + 3]}".encode()) & mask for i in range(len(w) - 2)]
+    return feats
+
+
+def featurize_batch(texts: Sequence[str], dim: int = DIM) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Flattened features for many texts: (idx, rows) where rows[j] is the text
+    that feature idx[j] belongs to.
+    """
+    idx: List[int] = []
+    rows: List[int] = []
+    for r, t in enumerate(texts):
+        f = featurize(t, dim)
+        idx += f
+        rows += [r] * len(f)
+    return np.asarray(idx, dtype=np.int64), np.asarray(rows, dtype=np.int64)
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-z))
+
+
+class SignalModel:
+    def __init__(self, W: np.ndarray, b: np.ndarray, signals: Sequence[str], version: str = "v2"):
+        # W: (dim, n_signals) so a feature id selects one row
+        self.W = np.ascontiguousarray(W, dtype=np.float32)
+        self.b = np.asarray(b, dtype=np.float32)
+        self.signals = tuple(signals)
+        self.dim = self.W.shape[0]
+        self.version = version
+
+    @classmethod
+    def load(cls, path: pathlib.Path = MODEL_PATH) -> "SignalModel":
+        with np.load(path, allow_pickle=False) as z:
+            return cls(z["W"], z["b"], [str(s) for s in z["signals"]], str(z["version"]))
+
+    def save(self, path: pathlib.Path = MODEL_PATH):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(path, W=self.W, b=self.b, signals=np.array(self.signals), version=np.array(self.version))
+
+    def logits_batch(self, texts: Sequence[str]) -> np.ndarray:
+        idx, rows = featurize_batch(texts, self.dim)
+        g = self.W[idx]
+        n = len(texts)
+        # one bincount per signal: a segmented sum without Python loops over rows
+        z = np.stack([np.bincount(rows, weights=g[:, k], minlength=n) for k in range(g.shape[1])], axis=1)
+        return z + self.b
+
+    def predict_batch(self, texts: Sequence[str]) -> np.ndarray:
+        """(len(texts), n_signals) probabilities."""
+        return _sigmoid(self.logits_batch(texts))
+
+    def predict(self, text: str) -> Dict[str, float]:
+        z = self.W[featurize(text, self.dim)].sum(axis=0) + self.b
+        return dict(zip(self.signals, _sigmoid(z).tolist()))
+
+    def confident(self, text: str, threshold: float = 0.9) -> frozenset:
+        """Signals predicted with probability >= threshold."""
+        return frozenset(s for s, p in self.predict(text).items() if p >= threshold)
+
+
+def load_default() -> Optional[SignalModel]:
+    """The shipped model, or None (tier disabled) if it has not been trained."""
+    if not MODEL_PATH.exists():
+        logger.info("no text-signal model at %s; learned tier disabled", MODEL_PATH)
+        return None
+    return SignalModel.load(MODEL_PATH)